@@ -1,3 +1,4 @@
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -14,14 +15,37 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Та же переменная окружения, что и у приложения (app.dependencies.DATABASE_URL),
+# и тот же разбор: postgres:// приводится к postgresql://
+if os.getenv("DATABASE_URL"):
+    from app.database import normalize_url
+
+    url = normalize_url(os.environ["DATABASE_URL"]).render_as_string(hide_password=False)
+    # ConfigParser трактует % как интерполяцию
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from sqlmodel import SQLModel
 
+import app.models.publication  # noqa: F401  регистрирует таблицы в metadata
+import app.models.purchase  # noqa: F401
+import app.models.refresh_token  # noqa: F401
+import app.models.user  # noqa: F401
+
 target_metadata = SQLModel.metadata
 
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # FTS5-таблица и её теневые таблицы создаются вручную, autogenerate их не трогает
+    if type_ == "table" and name.startswith("publication_fts"):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +68,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -67,7 +92,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
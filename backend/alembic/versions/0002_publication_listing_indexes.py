@@ -0,0 +1,40 @@
+"""publication listing indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LISTING_INDEXES = {
+    "ix_publication_listing": ["is_offer", "is_active", "created_at", "id"],
+    "ix_publication_listing_university": ["is_offer", "is_active", "university", "created_at", "id"],
+    "ix_publication_listing_university_faculty": [
+        "is_offer", "is_active", "university", "faculty", "created_at", "id",
+    ],
+    "ix_publication_listing_subject": ["is_offer", "is_active", "subject", "created_at", "id"],
+    "ix_publication_author": ["author_id", "is_active"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in LISTING_INDEXES.items():
+        op.create_index(name, "publication", columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in LISTING_INDEXES:
+        op.drop_index(name, table_name="publication")
@@ -0,0 +1,43 @@
+"""publication full-text search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS publication_fts "
+            "USING fts5(title, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO publication_fts (rowid, title, description) "
+            "SELECT id, title, description FROM publication WHERE is_active"
+        )
+    else:
+        op.execute(
+            "CREATE INDEX ix_publication_search ON publication "
+            "USING gin (to_tsvector('simple', title || ' ' || description))"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS publication_fts")
+    else:
+        op.drop_index("ix_publication_search", table_name="publication")
@@ -0,0 +1,30 @@
+"""publication author index with cursor key
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Профиль листает публикации автора курсором (created_at, id)
+    op.drop_index("ix_publication_author", table_name="publication")
+    op.create_index("ix_publication_author", "publication", ["author_id", "is_active", "created_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_publication_author", table_name="publication")
+    op.create_index("ix_publication_author", "publication", ["author_id", "is_active"])
@@ -0,0 +1,128 @@
+"""publication hot/cold split
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 14:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVE_ONLY = {"sqlite_where": sa.text("is_active = 1"), "postgresql_where": sa.text("is_active")}
+INACTIVE_ONLY = {"sqlite_where": sa.text("is_active = 0"), "postgresql_where": sa.text("NOT is_active")}
+
+LISTING_INDEXES = {
+    "ix_publication_listing": ["is_offer", "created_at", "id"],
+    "ix_publication_listing_university": ["is_offer", "university", "created_at", "id"],
+    "ix_publication_listing_university_faculty": ["is_offer", "university", "faculty", "created_at", "id"],
+    "ix_publication_listing_subject": ["is_offer", "subject", "created_at", "id"],
+}
+
+
+def purchase_table(with_publication_fk: bool) -> sa.Table:
+    """Таблица purchase из 0005. Внешний ключ там безымянный, поэтому в SQLite таблицу
+    пересоздаём по этому описанию, а не ищем ограничение по имени."""
+    constraints = [sa.ForeignKeyConstraint(["buyer_id"], ["usertable.id"])]
+    if with_publication_fk:
+        constraints.append(sa.ForeignKeyConstraint(["publication_id"], ["publication.id"]))
+    return sa.Table(
+        "purchase",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("publication_id", sa.Integer(), nullable=False),
+        sa.Column("buyer_id", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("idempotency_key", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        *constraints,
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("buyer_id", "idempotency_key", name="uq_purchase_buyer_idempotency_key"),
+        sa.Index("ix_purchase_publication", "publication_id", "created_at"),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    deactivated_at = sa.Column("deactivated_at", sa.DateTime(), nullable=True)
+    if op.get_bind().dialect.name == "sqlite":
+        # Без AUTOINCREMENT SQLite отдаёт освободившийся максимальный id заново: новая публикация
+        # получила бы id уже заархивированной. Таблицу пересоздаём, колонку добавляем заодно
+        with op.batch_alter_table(
+            "publication", recreate="always", table_kwargs={"sqlite_autoincrement": True}
+        ) as batch_op:
+            batch_op.add_column(deactivated_at)
+    else:
+        # В Postgres id выдаёт последовательность, значения не повторяются
+        op.add_column("publication", deactivated_at)
+    # Уже скрытые публикации считаем скрытыми с момента миграции: архиватор доберётся до них позже
+    op.execute("UPDATE publication SET deactivated_at = CURRENT_TIMESTAMP WHERE NOT is_active")
+
+    for name, columns in LISTING_INDEXES.items():
+        op.drop_index(name, table_name="publication")
+        op.create_index(name, "publication", columns, **ACTIVE_ONLY)
+    op.create_index("ix_publication_deactivated", "publication", ["deactivated_at"], **INACTIVE_ONLY)
+
+    op.create_table(
+        "publication_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("is_offer", sa.Boolean(), nullable=False),
+        sa.Column("title", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("university", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("faculty", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("subject", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("description", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("bought", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("deactivated_at", sa.DateTime(), nullable=True),
+        sa.Column("author_id", sa.Integer(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["author_id"], ["usertable.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_publication_archive_author", "publication_archive", ["author_id"])
+
+    # Покупка ссылается на публикацию, которая может уехать в архив
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table("purchase", copy_from=purchase_table(False), recreate="always"):
+            pass
+    else:
+        op.drop_constraint("purchase_publication_id_fkey", "purchase", type_="foreignkey")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Архивные строки возвращаются в горячую таблицу, иначе покупки останутся без публикаций
+    op.execute(
+        "INSERT INTO publication (id, is_offer, title, university, faculty, subject, price, "
+        "description, bought, is_active, created_at, deactivated_at, author_id) "
+        "SELECT id, is_offer, title, university, faculty, subject, price, "
+        "description, bought, is_active, created_at, deactivated_at, author_id FROM publication_archive"
+    )
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table("purchase", copy_from=purchase_table(True), recreate="always"):
+            pass
+    else:
+        op.create_foreign_key("purchase_publication_id_fkey", "purchase", "publication", ["publication_id"], ["id"])
+
+    op.drop_index("ix_publication_archive_author", table_name="publication_archive")
+    op.drop_table("publication_archive")
+
+    op.drop_index("ix_publication_deactivated", table_name="publication")
+    for name, columns in LISTING_INDEXES.items():
+        op.drop_index(name, table_name="publication")
+        op.create_index(name, "publication", columns[:1] + ["is_active"] + columns[1:])
+    with op.batch_alter_table("publication") as batch_op:
+        batch_op.drop_column("deactivated_at")
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from app.models.publication import Publication, PublicationArchive
+
+
+def archive_inactive_publications(db: Session, older_than: timedelta, batch_size: int) -> int:
+    """Переносит одну пачку давно скрытых публикаций в publication_archive.
+
+    DELETE ... RETURNING и INSERT в одной транзакции: строка либо в горячей таблице,
+    либо в архиве. Пачка выбирается по частичному индексу ix_publication_deactivated.
+    Возвращает число перенесённых строк; меньше batch_size — очередь пуста.
+    """
+    now = datetime.utcnow()
+    batch = (
+        select(Publication.id)
+        .where(Publication.is_active == False)
+        .where(Publication.deactivated_at < now - older_than)
+        .order_by(Publication.deactivated_at)
+        .limit(batch_size)
+    )
+    # is_active повторяется снаружи: публикацию могли снова показать между выбором и удалением
+    stmt = (
+        delete(Publication)
+        .where(Publication.id.in_(batch.scalar_subquery()))
+        .where(Publication.is_active == False)
+        .returning(*Publication.__table__.c)
+    )
+    rows = [{**row._mapping, "archived_at": now} for row in db.execute(stmt)]
+    if rows:
+        db.execute(insert(PublicationArchive), rows)
+    db.commit()
+    return len(rows)
+
+
+def restore_publication(db: Session, publication_id: int, author_id: int) -> bool:
+    """Возвращает публикацию автора из архива в горячую таблицу, без commit.
+
+    Вызывается из write-путей, когда UPDATE не нашёл строку: правка или повторный
+    показ идут дальше в той же транзакции. deactivated_at сдвигается на сейчас,
+    иначе архиватор унёс бы всё ещё скрытую публикацию обратно первым же проходом.
+    """
+    archived = PublicationArchive.__table__.c
+    stmt = (
+        delete(PublicationArchive)
+        .where(PublicationArchive.id == publication_id)
+        .where(PublicationArchive.author_id == author_id)
+        .returning(*(column for column in archived if column.name != "archived_at"))
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        return False
+    db.execute(insert(Publication).values(**{**row._mapping, "deactivated_at": datetime.utcnow()}))
+    return True
@@ -1,33 +1,75 @@
-from typing import List, Optional
+from typing import Dict, Optional, Tuple
+from sqlalchemy import case, func, union_all, update
 from sqlmodel import Session, select
-from app.crud.publication import get_publications_by_author
+from app.crud.user import invalidate_principal
+from app.models.publication import Publication, PublicationArchive
 from app.models.user import UserTable
-from app.schemas.user_profile import ProfileUpdate
+from app.utils.response_cache import response_cache
+from app.schemas.user_profile import ProfileUpdate, UserProfile
 
 
-def get_profile_by_id(db: Session, user_id: int) -> Optional[UserTable]:
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_if(condition, column):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def _author_rows(model, user_id: int):
+    return select(model.is_offer, model.is_active, model.bought).where(model.author_id == user_id)
+
+
+def get_profile_stats(db: Session, user_id: int) -> Dict[str, int]:
+    """Счётчики профиля одним агрегирующим запросом.
+
+    Продажи считаются и по архиву: публикация уходит туда, но помощь уже оказана.
+    Обе части читаются по индексам автора (ix_publication_author, ix_publication_archive_author).
+    """
+    rows = union_all(_author_rows(Publication, user_id), _author_rows(PublicationArchive, user_id)).subquery()
+    stmt = select(
+        _count_if(rows.c.is_active & rows.c.is_offer),
+        _count_if(rows.c.is_active & ~rows.c.is_offer),
+        _sum_if(rows.c.is_offer, rows.c.bought),
+        _sum_if(~rows.c.is_offer, rows.c.bought),
+    )
+    active_offers, active_requests, helped, got_help = db.exec(stmt).one()
+    return {
+        "active_offers": active_offers,
+        "active_requests": active_requests,
+        "helped": helped,
+        "got_help": got_help,
+    }
+
+
+def get_profile_by_id(db: Session, user_id: int) -> Optional[UserProfile]:
     user = db.get(UserTable, user_id)
     if not user:
         return None
 
-    publications = get_publications_by_author(db, user_id)
-    user.publications = publications  
+    return UserProfile.model_validate(user).model_copy(update=get_profile_stats(db, user_id))
 
-    return user
+
+def user_exists(db: Session, user_id: int) -> bool:
+    return db.exec(select(UserTable.id).where(UserTable.id == user_id)).first() is not None
 
 
 def edit_profile_by_id(db: Session, user_id: int, user_in: ProfileUpdate) -> Optional[UserTable]:
-    user = get_profile_by_id(db, user_id)
+    """Одним UPDATE ... RETURNING; объект отцепляется до commit, чтобы не перечитывать его после."""
+    stmt = (
+        update(UserTable)
+        .where(UserTable.id == user_id)
+        .values(**user_in.model_dump(exclude_unset=True))
+        .returning(UserTable)
+    )
+    user = db.execute(stmt).scalars().first()
     if not user:
         return None
 
-    update_data = user_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(user, field, value)
-
-    db.add(user)
+    db.expunge(user)
     db.commit()
-    db.refresh(user)
+    invalidate_principal(user.email)
+    response_cache.invalidate_author(user.id)
     return user
 
 
@@ -35,13 +77,18 @@ def update_user_avatar(
     db: Session,
     user_id: int,
     avatar_url: str
-) -> Optional[UserTable]:
-    user = db.get(UserTable, user_id)
+) -> Optional[Tuple[UserTable, Optional[str]]]:
+    """(пользователь, прежний avatar). Прежнее значение читается в той же транзакции
+    под FOR UPDATE, а не из закэшированного Principal: параллельная загрузка не оставит
+    на диске файлы, на которые уже никто не ссылается."""
+    previous = db.exec(select(UserTable.avatar).where(UserTable.id == user_id).with_for_update()).first()
+    stmt = update(UserTable).where(UserTable.id == user_id).values(avatar=avatar_url).returning(UserTable)
+    user = db.execute(stmt).scalars().first()
     if not user:
         return None
 
-    user.avatar = avatar_url
-    db.add(user)
+    db.expunge(user)
     db.commit()
-    db.refresh(user)
-    return user
\ No newline at end of file
+    invalidate_principal(user.email)
+    response_cache.invalidate_author(user.id)
+    return user, previous
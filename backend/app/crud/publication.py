@@ -1,19 +1,33 @@
-from typing import List, Optional
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import DateTime, String, case, delete, func, insert, literal, tuple_, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from sqlmodel import Session, select
-from app.models.publication import Publication
-from app.schemas.publication import PublicationCreate, PublicationUpdate
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.crud.archive import restore_publication
+from app.crud.search import apply_search, fts_query, index_publication, index_publications, unindex_publication
+from app.models.publication import Publication, PublicationArchive
+from app.models.purchase import Purchase
+from app.schemas.publication import PublicationCompact, PublicationCreate, PublicationUpdate
+from app.utils.feed import FeedEvent, publication_broker
+from app.utils.pagination import Cursor
+from app.utils.response_cache import response_cache
 
 
-def get_publications(
-    db: Session,
+def _listing_stmt(
     is_offer: bool,
     university: Optional[str] = None,
     faculty: Optional[str] = None,
     subject: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
-) -> List[Publication]:
-    stmt = select(Publication).where(Publication.is_offer == is_offer).where(Publication.is_active == True)
+):
+    stmt = (
+        select(Publication)
+        .options(joinedload(Publication.author))
+        .where(Publication.is_offer == is_offer)
+        .where(Publication.is_active == True)
+    )
 
     if university:
         stmt = stmt.where(Publication.university == university)
@@ -21,53 +35,445 @@ def get_publications(
         stmt = stmt.where(Publication.faculty == faculty)
     if subject:
         stmt = stmt.where(Publication.subject == subject)
+    return stmt
 
-    stmt = stmt.offset(skip).limit(limit)
-    return db.exec(stmt).all()
+
+def _page_stmt(
+    is_offer: bool,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    limit: int = 100,
+):
+    stmt = _listing_stmt(is_offer, university, faculty, subject)
+
+    if after:
+        stmt = stmt.where(tuple_(Publication.created_at, Publication.id) < tuple_(*after))
+
+    return stmt.order_by(Publication.created_at.desc(), Publication.id.desc()).limit(limit)
+
+
+def _search_stmt(
+    db: Union[Session, AsyncSession],
+    q: str,
+    is_offer: bool,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 100,
+):
+    stmt = apply_search(db, _listing_stmt(is_offer, university, faculty, subject), q)
+    return stmt.offset(offset).limit(limit)
+
+
+FACETS = ("university", "faculty", "subject")
+
+
+def _facets_stmt(
+    is_offer: bool,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+):
+    """Один запрос на все фасеты: каждый считается с фильтрами остальных, но не со своим.
+
+    Иначе при выбранном университете в списке остался бы только он.
+    """
+    filters = {"university": university, "faculty": faculty, "subject": subject}
+    selects = []
+    for facet in FACETS:
+        column = getattr(Publication, facet)
+        stmt = (
+            select(literal(facet).label("facet"), column.label("value"), func.count().label("count"))
+            .where(Publication.is_offer == is_offer)
+            .where(Publication.is_active == True)
+        )
+        for other, value in filters.items():
+            if other != facet and value:
+                stmt = stmt.where(getattr(Publication, other) == value)
+        selects.append(stmt.group_by(column))
+    return union_all(*selects)
+
+
+def _group_facets(rows) -> Dict[str, List[Tuple[str, int]]]:
+    facets: Dict[str, List[Tuple[str, int]]] = {facet: [] for facet in FACETS}
+    for facet, value, count in rows:
+        facets[facet].append((value, count))
+    for values in facets.values():
+        values.sort(key=lambda item: (-item[1], item[0]))
+    return facets
+
+
+def get_publications(
+    db: Session,
+    is_offer: bool,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    limit: int = 100,
+) -> List[Publication]:
+    return db.exec(_page_stmt(is_offer, university, faculty, subject, after, limit)).all()
+
+
+EXPORT_COLUMNS = (
+    "id", "is_offer", "title", "university", "faculty", "subject",
+    "price", "description", "bought", "is_active", "created_at", "author_id",
+)
+
+
+def iter_publications_for_export(
+    db: Session,
+    is_offer: Optional[bool] = None,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+    include_inactive: bool = False,
+    batch_size: int = 1000,
+) -> Iterator[Sequence]:
+    """Пачки строк (в порядке EXPORT_COLUMNS) для выгрузки любого размера.
+
+    yield_per тянет строки с сервера порциями — в Postgres через серверный курсор, —
+    так что в памяти не больше одной пачки. Выбираются колонки, а не ORM-объекты:
+    identity map не растёт вместе с выгрузкой. С include_inactive в выгрузку
+    попадает и publication_archive.
+    """
+    def columns(model):
+        stmt = select(*(getattr(model, name) for name in EXPORT_COLUMNS))
+        if is_offer is not None:
+            stmt = stmt.where(model.is_offer == is_offer)
+        if university:
+            stmt = stmt.where(model.university == university)
+        if faculty:
+            stmt = stmt.where(model.faculty == faculty)
+        if subject:
+            stmt = stmt.where(model.subject == subject)
+        return stmt
+
+    if include_inactive:
+        stmt = union_all(columns(Publication), columns(PublicationArchive))
+        stmt = stmt.order_by(stmt.selected_columns.id)
+    else:
+        stmt = columns(Publication).where(Publication.is_active == True).order_by(Publication.id)
+    yield from db.execute(stmt.execution_options(yield_per=batch_size)).partitions()
+
+
+def search_publications(
+    db: Session,
+    q: str,
+    is_offer: bool,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 100,
+) -> List[Publication]:
+    if not fts_query(q):
+        return []
+    return db.exec(_search_stmt(db, q, is_offer, university, faculty, subject, offset, limit)).all()
+
+
+def _after_write(pub: Publication, kind: str) -> None:
+    """После commit: сбросить закэшированные ответы и разослать изменение подписчикам живой ленты."""
+    response_cache.invalidate_publication(pub.id, pub.is_offer, pub.university, pub.faculty, pub.subject)
+    if not publication_broker.has_subscribers:
+        return
+    if kind == "deleted":
+        data = json.dumps({"id": pub.id}).encode()
+    else:
+        data = PublicationCompact.model_validate(pub).model_dump_json().encode()
+    publication_broker.publish(FeedEvent(kind, data), pub.is_offer, pub.university, pub.faculty, pub.subject)
 
 
 def create_publication(db: Session, pub_in: PublicationCreate, author_id: int) -> Publication:
-    pub = Publication(**pub_in.dict(), author_id=author_id)
+    pub = Publication(**pub_in.model_dump(), author_id=author_id)
     db.add(pub)
+    db.flush()
+    index_publication(db, pub)
+    # Все поля известны после INSERT, refresh не нужен; автора роут берёт из Principal
+    db.expunge(pub)
     db.commit()
-    db.refresh(pub)
+    _after_write(pub, "created")
     return pub
 
 
-def get_publication_by_id(db: Session, publication_id: int) -> Optional[Publication]:
-    return db.get(Publication, publication_id)
+def _publications_by_ids(db: Session, publication_ids: Sequence[int]) -> List[Publication]:
+    stmt = (
+        select(Publication)
+        .options(joinedload(Publication.author))
+        .where(Publication.id.in_(publication_ids))
+        .order_by(Publication.id)
+        .execution_options(populate_existing=True)
+    )
+    return db.exec(stmt).all()
+
+
+def create_publications(db: Session, pubs_in: Sequence[PublicationCreate], author_id: int) -> List[Publication]:
+    """Все публикации пачки в одной транзакции: либо создаются все, либо ни одной."""
+    # Через модель, чтобы подставились значения по умолчанию (bought, is_active, created_at)
+    rows = [Publication(**pub_in.model_dump(), author_id=author_id).model_dump(exclude={"id"}) for pub_in in pubs_in]
+    # Core-вставка уходит пачкой; ORM на SQLite вставлял бы строки по одной ради порядка id
+    ids = db.execute(insert(Publication).returning(Publication.id), rows).scalars().all()
+    index_publications(db, ids)
+    db.commit()
+    pubs = _publications_by_ids(db, ids)
+    for pub in pubs:
+        _after_write(pub, "created")
+    return pubs
 
 
-def get_publications_by_author(db: Session, author_id: int) -> List[Publication]:
-    stmt = select(Publication).where(Publication.author_id == author_id).where(Publication.is_active == True)
+def get_publication_by_id(db: Session, publication_id: int) -> Optional[Union[Publication, PublicationArchive]]:
+    """Сначала горячая таблица, затем архив: id при архивации сохраняется."""
+    return db.get(Publication, publication_id) or db.get(PublicationArchive, publication_id)
+
+
+def get_publications_by_author(
+    db: Session,
+    author_id: int,
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None,
+) -> List[Publication]:
+    stmt = (
+        select(Publication)
+        .options(joinedload(Publication.author))
+        .where(Publication.author_id == author_id)
+        .where(Publication.is_active == True)
+    )
+    if after:
+        stmt = stmt.where(tuple_(Publication.created_at, Publication.id) < tuple_(*after))
+    stmt = stmt.order_by(Publication.created_at.desc(), Publication.id.desc()).limit(limit)
     publications = db.exec(stmt).all()
     return publications
 
 
-def delete_publication_by_id(db: Session, publication: Publication) -> None:
-    db.delete(publication)
+def publication_exists(db: Session, publication_id: int) -> bool:
+    """Есть ли публикация в горячей таблице или в архиве."""
+    for model in (Publication, PublicationArchive):
+        if db.exec(select(model.id).where(model.id == publication_id)).first() is not None:
+            return True
+    return False
+
+
+def _owned(stmt, publication_id: int, author_id: int):
+    return stmt.where(Publication.id == publication_id).where(Publication.author_id == author_id)
+
+
+def delete_publication_by_id(db: Session, publication_id: int, author_id: int) -> bool:
+    """Удаляет публикацию автора одним DELETE ... RETURNING.
+
+    False — публикации нет, она чужая или уже куплена: внешнего ключа из purchase
+    больше нет, и историю покупок бережёт условие bought = 0.
+    """
+    stmt = _owned(delete(Publication), publication_id, author_id).where(Publication.bought == 0).returning(
+        Publication.id, Publication.is_offer, Publication.university, Publication.faculty, Publication.subject
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        return False
+    unindex_publication(db, row.id)
     db.commit()
+    _after_write(row, "deleted")
+    return True
+
 
+def _update_owned(db: Session, publication_id: int, author_id: int, values: dict, reindex: bool) -> Optional[Publication]:
+    """UPDATE ... WHERE id AND author_id RETURNING вместо чтения, проверки и refresh.
 
-def edit_publication_by_id(db: Session, publication_id: int, pub_in: PublicationUpdate) -> Optional[Publication]:
-    pub = get_publication_by_id(db, publication_id)
-    if not pub:
+    Автор в ответ не подгружается — роут берёт его из Principal. Объект отцепляется
+    от сессии до commit, чтобы commit не сбросил атрибуты и их не пришлось перечитывать.
+    Заархивированную публикацию автора сначала возвращает из архива.
+    """
+    def write() -> Optional[Publication]:
+        if values:
+            stmt = _owned(update(Publication), publication_id, author_id).values(**values).returning(Publication)
+            return db.execute(stmt).scalars().first()
+        return db.exec(_owned(select(Publication), publication_id, author_id)).first()
+
+    pub = write()
+    if pub is None and restore_publication(db, publication_id, author_id):
+        pub = write()
+    if pub is None:
         return None
-    update_data = pub_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(pub, field, value)
-    db.add(pub)
+    if reindex:
+        index_publication(db, pub)
+    db.expunge(pub)
     db.commit()
-    db.refresh(pub)
+    _after_write(pub, "updated")
     return pub
 
 
-def update_publication_state(db: Session, publication_id: int, is_active: bool) -> Optional[Publication]:
-    pub = get_publication_by_id(db, publication_id)
-    if not pub:
-        return None
-    pub.is_active = is_active
-    db.add(pub)
+def edit_publication_by_id(
+    db: Session, publication_id: int, author_id: int, pub_in: PublicationUpdate
+) -> Optional[Publication]:
+    values = pub_in.model_dump(exclude_unset=True)
+    # Цена в поисковый индекс не входит
+    reindex = bool(values.keys() & {"title", "description"})
+    return _update_owned(db, publication_id, author_id, values, reindex)
+
+
+def _state_values(is_active: bool) -> dict:
+    """Значения для смены видимости. Повторное скрытие не сдвигает deactivated_at,
+    иначе архиватор откладывал бы публикацию при каждом запросе."""
+    if is_active:
+        return {"is_active": True, "deactivated_at": None}
+    deactivated_at = case(
+        (Publication.is_active == True, literal(datetime.utcnow(), DateTime)),
+        else_=Publication.deactivated_at,
+    )
+    return {"is_active": False, "deactivated_at": deactivated_at}
+
+
+def update_publication_state(db: Session, publication_id: int, author_id: int, is_active: bool) -> Optional[Publication]:
+    return _update_owned(db, publication_id, author_id, _state_values(is_active), reindex=True)
+
+
+def get_publication_owners(db: Session, publication_ids: Sequence[int]) -> dict:
+    """{id: author_id} для существующих публикаций из списка — одним запросом."""
+    stmt = select(Publication.id, Publication.author_id).where(Publication.id.in_(publication_ids))
+    return dict(db.exec(stmt).all())
+
+
+def update_publications_state(db: Session, publication_ids: Sequence[int], is_active: bool) -> List[Publication]:
+    db.execute(
+        update(Publication)
+        .where(Publication.id.in_(publication_ids))
+        .values(**_state_values(is_active))
+        .execution_options(synchronize_session=False)
+    )
+    index_publications(db, publication_ids)
     db.commit()
-    db.refresh(pub)
+    pubs = _publications_by_ids(db, publication_ids)
+    for pub in pubs:
+        _after_write(pub, "updated")
+    return pubs
+
+
+# ——————————————
+# Покупки
+# ——————————————
+
+def get_purchase_by_key(db: Session, buyer_id: int, idempotency_key: str) -> Optional[Purchase]:
+    stmt = select(Purchase).where(Purchase.buyer_id == buyer_id).where(Purchase.idempotency_key == idempotency_key)
+    return db.exec(stmt).first()
+
+
+def purchase_publication(
+    db: Session,
+    publication_id: int,
+    buyer_id: int,
+    idempotency_key: Optional[str] = None,
+) -> Tuple[Optional[Purchase], bool]:
+    """Покупка: строка purchase и bought = bought + 1 в одной транзакции.
+
+    Возвращает (покупка, создана ли сейчас). (None, False) — публикации нет,
+    она неактивна или принадлежит покупателю. При повторе возвращается исходная
+    покупка по ключу — даже если она была сделана по другой публикации: это
+    проверяет вызывающий.
+
+    Проверка публикации и снимок цены — внутри INSERT ... SELECT, счётчик растёт
+    в SQL без чтения-изменения-записи, а строка публикации блокируется только
+    последним UPDATE перед commit. Повтор с тем же ключом ловит уникальный индекс:
+    предварительного SELECT нет, поэтому транзакция сразу начинается с записи.
+    """
+    source = (
+        select(
+            Publication.id,
+            literal(buyer_id),
+            Publication.price,
+            literal(idempotency_key, String),
+            literal(datetime.utcnow(), DateTime),
+        )
+        .where(Publication.id == publication_id)
+        .where(Publication.is_active == True)
+        .where(Publication.author_id != buyer_id)
+    )
+    stmt = (
+        insert(Purchase)
+        .from_select(["publication_id", "buyer_id", "price", "idempotency_key", "created_at"], source)
+        .returning(Purchase)
+    )
+    try:
+        purchase = db.execute(stmt).scalars().first()
+    except IntegrityError:
+        db.rollback()
+        if idempotency_key is None:
+            raise
+        return get_purchase_by_key(db, buyer_id, idempotency_key), False
+    if purchase is None:
+        db.rollback()
+        # Повтор после того, как публикацию скрыли: INSERT не дошёл до уникального индекса,
+        # но исходная покупка есть и её нужно вернуть, а не ошибку
+        if idempotency_key is not None:
+            replayed = get_purchase_by_key(db, buyer_id, idempotency_key)
+            if replayed is not None:
+                return replayed, False
+        return None, False
+
+    db.execute(
+        update(Publication)
+        .where(Publication.id == publication_id)
+        .values(bought=Publication.bought + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.expunge(purchase)
+    db.commit()
+    # Ленты с устаревшим bought доживают до TTL: сбрасывать их на каждую покупку
+    # популярного предложения значило бы постоянно обнулять кэш
+    response_cache.invalidate_detail(publication_id)
+    return purchase, True
+
+
+# ——————————————
+# Async-версии для async def роутов
+# ——————————————
+
+async def get_publications_async(
+    db: AsyncSession,
+    is_offer: bool,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    limit: int = 100,
+) -> List[Publication]:
+    result = await db.exec(_page_stmt(is_offer, university, faculty, subject, after, limit))
+    return result.all()
+
+
+async def search_publications_async(
+    db: AsyncSession,
+    q: str,
+    is_offer: bool,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 100,
+) -> List[Publication]:
+    if not fts_query(q):
+        return []
+    result = await db.exec(_search_stmt(db, q, is_offer, university, faculty, subject, offset, limit))
+    return result.all()
+
+
+async def get_publication_by_id_async(
+    db: AsyncSession, publication_id: int
+) -> Optional[Union[Publication, PublicationArchive]]:
+    # Ленивой загрузки в async-сессии нет, поэтому автора подгружаем сразу
+    pub = await db.get(Publication, publication_id, options=[joinedload(Publication.author)])
+    if pub is None:
+        pub = await db.get(PublicationArchive, publication_id, options=[joinedload(PublicationArchive.author)])
     return pub
+
+
+async def get_facet_counts_async(
+    db: AsyncSession,
+    is_offer: bool,
+    university: Optional[str] = None,
+    faculty: Optional[str] = None,
+    subject: Optional[str] = None,
+) -> Dict[str, List[Tuple[str, int]]]:
+    result = await db.execute(_facets_stmt(is_offer, university, faculty, subject))
+    return _group_facets(result.all())
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dependencies import REFRESH_TOKEN_EXPIRE_DAYS, REFRESH_TOKEN_REUSE_GRACE_SECONDS
+from app.models.refresh_token import RefreshToken
+from app.models.user import UserTable
+from app.utils.authentication import create_refresh_token, hash_refresh_token
+
+
+def _new_refresh_token(user_id: int) -> Tuple[str, RefreshToken]:
+    token, token_hash = create_refresh_token()
+    row = RefreshToken(
+        user_id=user_id,
+        token_hash=token_hash,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    return token, row
+
+
+async def issue_refresh_token_async(db: AsyncSession, user_id: int) -> str:
+    await _purge_expired(db, user_id, datetime.utcnow())
+    token, row = _new_refresh_token(user_id)
+    db.add(row)
+    await db.commit()
+    return token
+
+
+async def rotate_refresh_token_async(db: AsyncSession, token: str) -> Optional[Tuple[str, str]]:
+    """Гасит предъявленный токен и выдаёт новый: (новый refresh-токен, email владельца).
+
+    Проверка и отзыв — один UPDATE ... WHERE token_hash по уникальному индексу, поэтому
+    один и тот же токен не обменять дважды даже параллельными запросами.
+    None — токен неизвестен, истёк или уже использован.
+    """
+    now = datetime.utcnow()
+    token_hash = hash_refresh_token(token)
+    # id и email владельца приходят тем же UPDATE: email — подзапросом в RETURNING
+    # (SQLite не отдаёт в RETURNING колонки таблиц из UPDATE ... FROM)
+    email = select(UserTable.email).where(UserTable.id == RefreshToken.user_id).scalar_subquery()
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == token_hash)
+        .where(RefreshToken.revoked_at == None)
+        .where(RefreshToken.expires_at > now)
+        .values(revoked_at=now)
+        .returning(RefreshToken.user_id, email.label("email"))
+    )
+    owner = result.first()
+    if owner is None:
+        await _revoke_if_reused(db, token_hash, now)
+        return None
+
+    await _purge_expired(db, owner.user_id, now)
+    new_token, row = _new_refresh_token(owner.user_id)
+    db.add(row)
+    await db.commit()
+    return new_token, owner.email
+
+
+async def _purge_expired(db: AsyncSession, user_id: int, now: datetime) -> None:
+    # Каждая ротация добавляет строку, поэтому истёкшие строки владельца удаляются при ротации
+    # (индекс по user_id). Отозванные, но не истёкшие остаются: по ним ловится повторное предъявление
+    await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.user_id == user_id)
+        .where(RefreshToken.expires_at <= now)
+    )
+
+
+async def _revoke_if_reused(db: AsyncSession, token_hash: str, now: datetime) -> None:
+    # Уже отозванный токен предъявлен снова — скорее всего, его украли:
+    # гасим все сессии владельца, пусть войдёт заново по паролю.
+    # Исключение — токен, заменённый только что: так выглядят две вкладки с одним токеном
+    row = (await db.exec(select(RefreshToken).where(RefreshToken.token_hash == token_hash))).first()
+    if row is None or row.revoked_at is None:
+        return
+    if now - row.revoked_at <= timedelta(seconds=REFRESH_TOKEN_REUSE_GRACE_SECONDS):
+        return
+    await revoke_user_refresh_tokens_async(db, row.user_id)
+
+
+async def revoke_refresh_token_async(db: AsyncSession, token: str) -> bool:
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+        .where(RefreshToken.revoked_at == None)
+        .values(revoked_at=datetime.utcnow())
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def revoke_user_refresh_tokens_async(db: AsyncSession, user_id: int) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id)
+        .where(RefreshToken.revoked_at == None)
+        .values(revoked_at=datetime.utcnow())
+    )
+    await db.commit()
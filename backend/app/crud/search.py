@@ -0,0 +1,84 @@
+import re
+from typing import Collection, Optional
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlmodel import Session
+
+from app.models.publication import SEARCH_DOCUMENT_SQL, Publication
+
+# FTS5-таблица из app.models.publication; rowid совпадает с publication.id
+publication_fts = table("publication_fts", column("rowid"), column("title"), column("description"))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _is_sqlite(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def fts_query(q: str) -> Optional[str]:
+    """Переводит пользовательский ввод в безопасный FTS5-запрос: все слова, каждое как префикс."""
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def pg_tsquery(q: str) -> Optional[str]:
+    """То же для to_tsquery в Postgres: все слова, каждое как префикс (:*), как в FTS5."""
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    return " & ".join(f"'{token}':*" for token in tokens)
+
+
+def index_publication(db: Session, pub: Publication) -> None:
+    """Обновляет запись публикации в индексе. В индексе лежат только активные публикации.
+
+    Вызывается из write-путей в той же транзакции; в Postgres индекс обновляется сам.
+    """
+    if not _is_sqlite(db):
+        return
+    db.execute(publication_fts.delete().where(publication_fts.c.rowid == pub.id))
+    if pub.is_active:
+        db.execute(
+            publication_fts.insert().values(rowid=pub.id, title=pub.title, description=pub.description)
+        )
+
+
+def index_publications(db: Session, publication_ids: Collection[int]) -> None:
+    """Пакетная версия index_publication: два запроса на любое число публикаций."""
+    if not _is_sqlite(db) or not publication_ids:
+        return
+    db.execute(publication_fts.delete().where(publication_fts.c.rowid.in_(publication_ids)))
+    active = (
+        select(Publication.id, Publication.title, Publication.description)
+        .where(Publication.id.in_(publication_ids))
+        .where(Publication.is_active == True)
+    )
+    db.execute(publication_fts.insert().from_select(["rowid", "title", "description"], active))
+
+
+def unindex_publication(db: Session, publication_id: int) -> None:
+    if not _is_sqlite(db):
+        return
+    db.execute(publication_fts.delete().where(publication_fts.c.rowid == publication_id))
+
+
+def apply_search(db: Session, stmt, q: str):
+    """Ограничивает select(Publication) совпадениями с q и сортирует по релевантности."""
+    if _is_sqlite(db):
+        fts = literal_column("publication_fts")
+        return (
+            stmt.join(publication_fts, publication_fts.c.rowid == Publication.id)
+            .where(fts.match(fts_query(q)))
+            .order_by(func.bm25(fts), Publication.id.desc())
+        )
+
+    document = literal_column(SEARCH_DOCUMENT_SQL)
+    # Конфигурация — литерал; сам запрос можно передать параметром, на выбор индекса он не влияет
+    query = func.to_tsquery(literal_column("'simple'"), pg_tsquery(q))
+    return (
+        stmt.where(document.op("@@")(query))
+        .order_by(func.ts_rank(document, query).desc(), Publication.id.desc())
+    )
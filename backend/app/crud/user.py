@@ -1,10 +1,17 @@
-from typing import List
+from typing import List, Optional
+from sqlalchemy.orm import joinedload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.publication import Publication
+from app.dependencies import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
 from app.models.user import UserTable
+from app.schemas.principal import Principal
 from app.schemas.user_create import UserCreate
 
-from app.utils.authentication import get_password_hash
+from app.utils.authentication import get_password_hash, get_password_hash_async
+from app.utils.cache import TTLCache
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
 
 
 def get_user_by_id(db: Session, id: int) -> UserTable | None:
@@ -17,14 +24,33 @@ def get_user_by_email(db: Session, email: str) -> UserTable | None:
     return db.exec(stmt).first()
 
 
-def create_user(db: Session, user_in: UserCreate) -> UserTable:
-    hashed = get_password_hash(user_in.password)
-    user = UserTable(
+def get_principal_by_email(db: Session, email: str) -> Optional[Principal]:
+    principal = principal_cache.get(email)
+    if principal is None:
+        user = get_user_by_email(db, email)
+        if not user:
+            return None
+        principal = Principal.model_validate(user)
+        principal_cache.set(email, principal)
+    return principal
+
+
+def invalidate_principal(email: str) -> None:
+    principal_cache.delete(email)
+
+
+def _new_user(user_in: UserCreate, hashed: str) -> UserTable:
+    return UserTable(
         name=user_in.name,
         university=user_in.university,
         email=user_in.email, 
         hashed_password=hashed
     )
+
+
+def create_user(db: Session, user_in: UserCreate) -> UserTable:
+    hashed = get_password_hash(user_in.password)
+    user = _new_user(user_in, hashed)
     db.add(user)
     db.commit()
     db.refresh(user)
@@ -32,6 +58,21 @@ def create_user(db: Session, user_in: UserCreate) -> UserTable:
 
 
 def get_my_publications(db: Session, author_id: int) -> List[Publication]:
-    stmt = select(Publication).where(Publication.author_id == author_id)
+    stmt = select(Publication).options(joinedload(Publication.author)).where(Publication.author_id == author_id)
     publications = db.exec(stmt).all()
     return publications
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> UserTable | None:
+    stmt = select(UserTable).where(UserTable.email == email)
+    result = await db.exec(stmt)
+    return result.first()
+
+
+async def create_user_async(db: AsyncSession, user_in: UserCreate) -> UserTable:
+    hashed = await get_password_hash_async(user_in.password)
+    user = _new_user(user_in, hashed)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
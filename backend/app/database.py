@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import create_engine
+
+# Асинхронные драйверы для тех же баз: aiosqlite локально, asyncpg для Postgres.
+# Синхронный драйвер из DATABASE_URL (postgresql+psycopg2 и т.п.) заменяется на эти
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+# Устаревшая схема postgres:// (её выдают некоторые хостинги) в SQLAlchemy 2.0 не поддерживается
+BACKEND_ALIASES = {"postgres": "postgresql"}
+
+
+@dataclass
+class DatabaseSettings:
+    """Параметры движков; значения задаются в app.dependencies из окружения."""
+    # Пул соединений (Postgres)
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # PRAGMA для SQLite
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_size_kib: int = 20000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+
+
+def normalize_url(url: str) -> URL:
+    parsed = make_url(url)
+    backend, _, driver = parsed.drivername.partition("+")
+    backend = BACKEND_ALIASES.get(backend, backend)
+    return parsed.set(drivername=f"{backend}+{driver}" if driver else backend)
+
+
+def to_async_url(url: str) -> URL:
+    """URL для create_async_engine: тот же адрес, драйвер — асинхронный из ASYNC_DRIVERS.
+
+    Возвращается объект URL, а не строка: str(URL) прячет пароль.
+    """
+    parsed = normalize_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return parsed
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def is_sqlite(url: str) -> bool:
+    return normalize_url(url).get_backend_name() == "sqlite"
+
+
+def _engine_kwargs(url: str, settings: DatabaseSettings) -> Dict[str, Any]:
+    if is_sqlite(url):
+        # Блокировки ждёт сам SQLite (busy_timeout), пул Python тут ничего не ускоряет
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+
+def _install_sqlite_pragmas(engine: Engine, settings: DatabaseSettings, read_only: bool) -> None:
+    """WAL: читатели не ждут писателя; busy_timeout: писатели ждут друг друга, а не падают с 'database is locked'."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        # Внешние ключи проверяются, как в Postgres: например, у публикации должен быть существующий автор
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def create_db_engine(url: str, settings: DatabaseSettings, read_only: bool = False) -> Engine:
+    engine = create_engine(normalize_url(url), **_engine_kwargs(url, settings))
+    if is_sqlite(url):
+        _install_sqlite_pragmas(engine, settings, read_only)
+    return engine
+
+
+def create_async_db_engine(url: str, settings: DatabaseSettings, read_only: bool = False) -> AsyncEngine:
+    async_url = to_async_url(url)
+    engine = create_async_engine(async_url, **_engine_kwargs(url, settings))
+    if is_sqlite(url):
+        _install_sqlite_pragmas(engine.sync_engine, settings, read_only)
+    return engine
+
+
+def check_schema_revision(engine: Engine, script_location: str) -> None:
+    """Сверяет ревизию базы с head миграций, не трогая схему. Alembic грузится только здесь."""
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", script_location)
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+    if current != heads:
+        raise RuntimeError(
+            f"Database revision {sorted(current) or 'none'} does not match migrations head {sorted(heads)}; "
+            "run `alembic upgrade head`"
+        )
@@ -1,35 +1,164 @@
 # app/dependencies.py
 
-from typing import Generator
+import os
+from typing import AsyncGenerator, Generator
 from datetime import timedelta
 
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import create_engine, Session
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import DatabaseSettings, create_async_db_engine, create_db_engine, is_sqlite
 
 # ——————————————
 # База данных
 # ——————————————
-DATABASE_URL = "sqlite:///./database.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
+# Реплика для GET-роутов; без неё читаем из основной базы
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
+# Пул у каждого движка свой: основной и async (с репликой — ещё read и async read) держат
+# до pool_size + max_overflow соединений каждый, и так в каждом воркере
+db_settings = DatabaseSettings(
+    pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    sqlite_busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    sqlite_synchronous=os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
 )
 
+# Что делать со схемой при старте воркера:
+#   create_all — создать недостающие таблицы (локальная разработка),
+#   check      — только сверить ревизию Alembic с head (прод: схему меняют миграции),
+#   skip       — ничего не проверять
+SCHEMA_STARTUP_MODE = os.getenv("SCHEMA_STARTUP_MODE", "create_all")
+
+engine = create_db_engine(DATABASE_URL, db_settings)
+# Асинхронный движок на той же базе для async def роутов
+async_engine = create_async_db_engine(DATABASE_URL, db_settings)
+
+# Отдельный read-only движок: реплика, либо тот же файл SQLite с query_only (в WAL читатели не ждут писателя)
+if DATABASE_READ_URL or is_sqlite(DATABASE_URL):
+    read_url = DATABASE_READ_URL or DATABASE_URL
+    read_engine = create_db_engine(read_url, db_settings, read_only=True)
+    async_read_engine = create_async_db_engine(read_url, db_settings, read_only=True)
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+
 def get_session() -> Generator[Session, None, None]:
     """FastAPI dependency для работы с сессией SQLModel/SQLAlchemy."""
     with Session(engine) as session:
         yield session
 
 
+def get_read_session() -> Generator[Session, None, None]:
+    """Сессия только для чтения, для GET-роутов."""
+    with Session(read_engine) as session:
+        yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency для async def роутов: не занимает поток из threadpool."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_read_engine, expire_on_commit=False) as session:
+        yield session
+
+
 # ——————————————
 # Настройки безопасности
 # ——————————————
 SECRET_KEY = "your-very-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Refresh-токен живёт долго и меняется при каждом обновлении access-токена
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# Только что заменённый токен, предъявленный повторно в этом окне, — гонка вкладок, а не кража:
+# запрос отклоняется, но остальные сессии пользователя не гасятся
+REFRESH_TOKEN_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_TOKEN_REUSE_GRACE_SECONDS", "30"))
+
+# bcrypt считается в отдельном пуле процессов, чтобы не держать GIL и потоки роутов
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Сколько операций может ждать пул; сверх этого отвечаем 503 с Retry-After
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "64"))
+PASSWORD_HASH_RETRY_AFTER = 1
+
+# Кэш пользователей по subject токена: обычный авторизованный запрос не ходит в БД
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+# Модераторы (через запятую): им доступна полная выгрузка публикаций, включая скрытые
+MODERATOR_EMAILS = frozenset(
+    email.strip().lower() for email in os.getenv("MODERATOR_EMAILS", "").split(",") if email.strip()
+)
 
 # OAuth2 схема для Depends в роутерах
 # при логине у нас tokenUrl="/users/login"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+
+# ——————————————
+# Кэш ответов
+# ——————————————
+# Записи сбрасываются write-путями из crud/, но только в своём процессе: при нескольких
+# воркерах uvicorn остальные отдают старую ленту (и 304 на неё), пока запись не истечёт.
+# Поэтому TTL короткий — это и есть допустимое отставание. С одним воркером его можно поднять
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "5"))
+# Счётчики фильтров не инвалидируются при записи: небольшое отставание для боковой панели допустимо
+FACETS_CACHE_SIZE = int(os.getenv("FACETS_CACHE_SIZE", "512"))
+FACETS_CACHE_TTL = float(os.getenv("FACETS_CACHE_TTL", "30"))
+
+
+# ——————————————
+# Живая лента
+# ——————————————
+# Сколько событий может ждать один клиент; переполнение — клиент отключается
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", "100"))
+# Пустые SSE-комментарии, чтобы прокси не закрывали простаивающее соединение
+FEED_HEARTBEAT_SECONDS = float(os.getenv("FEED_HEARTBEAT_SECONDS", "15"))
+
+
+# ——————————————
+# Ограничение частоты входа и регистрации
+# ——————————————
+# memory — счётчики в процессе (каждый воркер считает сам), redis — общие для всех воркеров
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Секунд на соединение и ответ Redis; дольше — считаем его недоступным и лимитируем в памяти
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25"))
+# Попыток в минуту; столько же допускается разом
+LOGIN_RATE_PER_IP = int(os.getenv("LOGIN_RATE_PER_IP", "20"))
+LOGIN_RATE_PER_EMAIL = int(os.getenv("LOGIN_RATE_PER_EMAIL", "5"))
+REGISTER_RATE_PER_IP = int(os.getenv("REGISTER_RATE_PER_IP", "5"))
+
+
+# ——————————————
+# Сжатие ответов
+# ——————————————
+# Меньше ~1 КБ сжатие почти не экономит трафик, но стоит CPU
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+# Невысокие уровни: сжатие идёт на каждый ответ, выигрыш старших уровней не окупает CPU
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+
+# ——————————————
+# Архив публикаций
+# ——————————————
+# Скрытые дольше этого срока публикации переносятся в publication_archive
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+# Строк за одну транзакцию: короткие транзакции не держат блокировку записи в SQLite
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+# Выключен по умолчанию: переменная задаётся у всех воркеров сразу, а проход нужен один.
+# Включается в одном процессе (отдельный воркер или cron-контейнер)
+ARCHIVER_ENABLED = os.getenv("ARCHIVER_ENABLED", "false").lower() == "true"
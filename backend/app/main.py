@@ -1,14 +1,32 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from sqlmodel import SQLModel
 
-from app.dependencies import engine
+from app.database import check_schema_revision
+from app.dependencies import (
+    ARCHIVER_ENABLED,
+    BROTLI_QUALITY,
+    COMPRESSION_MINIMUM_SIZE,
+    GZIP_COMPRESS_LEVEL,
+    SCHEMA_STARTUP_MODE,
+    async_engine,
+    async_read_engine,
+    engine,
+    read_engine,
+)
+from app.utils.archiver import start_archiver, stop_archiver
+from app.utils.authentication import shutdown_password_pool, start_password_pool
+from app.utils.compression import CompressionMiddleware
+from app.utils.feed import publication_broker
+from app.utils.metrics import instrument_engine
+from app.utils.metrics_middleware import MetricsMiddleware
+from app.utils.static_files import ImmutableStaticFiles
 from app.routers.auth import router as auth_router
 from app.routers.user import router as user_router
 from app.routers.helloworld import router as hello_router
 from app.routers.publication import router as publications_router
 from app.routers.profile import router as profile_router
+from app.routers.metrics import router as metrics_router
 
 
 app = FastAPI(title="UNI:HELP API")
@@ -17,7 +35,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 app.mount(
   "/static",
-  StaticFiles(directory=BASE_DIR / "static"),
+  ImmutableStaticFiles(directory=BASE_DIR / "static"),
   name="static",
 )
 
@@ -29,13 +47,48 @@ app.add_middleware(
     allow_methods=["*"],      # OPTIONS, GET, POST, etc.
     allow_headers=["*"],      # allow all headers (Authorization, Content-Type…)
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    gzip_level=GZIP_COMPRESS_LEVEL,
+    brotli_quality=BROTLI_QUALITY,
+)
+# Добавлен последним — внешний слой: время ответа включает CORS и все остальные middleware
+app.add_middleware(MetricsMiddleware)
+
+# Для async-движков события вешаются на sync_engine; instrument_engine пропускает повторы
+for _engine in (engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine):
+    instrument_engine(_engine)
 
 @app.on_event("startup")
 def on_startup():
-    SQLModel.metadata.create_all(engine)
+    start_password_pool()
+    if SCHEMA_STARTUP_MODE == "create_all":
+        SQLModel.metadata.create_all(engine)
+    elif SCHEMA_STARTUP_MODE == "check":
+        check_schema_revision(engine, str(BASE_DIR / "alembic"))
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    # Фоновая задача живёт в event loop приложения, поэтому обработчик асинхронный
+    if ARCHIVER_ENABLED:
+        start_archiver()
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await stop_archiver()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    publication_broker.close_all()
+    shutdown_password_pool()
 
 app.include_router(hello_router)
 app.include_router(auth_router)
 app.include_router(publications_router)
 app.include_router(user_router)
 app.include_router(profile_router)
+app.include_router(metrics_router)
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING, Optional
 from datetime import datetime
+from sqlalchemy import DDL, Index, event, text
 from sqlmodel import SQLModel, Field, Relationship
 from app.models.user import UserTable
 
@@ -8,9 +9,20 @@ if TYPE_CHECKING:
     from app.models.user import UserTable
 
 
-class Publication(SQLModel, table=True):
-    __tablename__ = "publication"
+# Листинги читают только активные публикации, поэтому их индексы частичные: неактивные
+# записи не раздувают их. В SQLite условие должно совпадать с тем, как SQLAlchemy
+# рендерит is_active == True, иначе планировщик индекс не выберет
+ACTIVE_ONLY = {"sqlite_where": text("is_active = 1"), "postgresql_where": text("is_active")}
+INACTIVE_ONLY = {"sqlite_where": text("is_active = 0"), "postgresql_where": text("NOT is_active")}
+
+# Выражение GIN-индекса полнотекстового поиска в Postgres (миграция 0003). Запрос в
+# app.crud.search использует ту же строку: планировщик берёт индекс, только если выражение
+# совпадает, а 'simple', переданный параметром, вместо литерала этому мешает
+SEARCH_DOCUMENT_SQL = "to_tsvector('simple', title || ' ' || description)"
+
 
+class PublicationFields(SQLModel):
+    """Колонки публикации; общие у горячей таблицы и архива."""
     id: Optional[int] = Field(default=None, primary_key=True)
     is_offer: bool = Field(nullable=False, description="Это предложение (offer) или запрос (request)")
     title: str = Field(nullable=False)
@@ -22,6 +34,59 @@ class Publication(SQLModel, table=True):
     bought: int = Field(default=0, description="Сколько раз куплено")
     is_active: bool = Field(default=True, description="Активна ли публикация")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    deactivated_at: Optional[datetime] = Field(default=None, nullable=True, description="Когда скрыта; по нему архивируется")
     author_id: int = Field(foreign_key="usertable.id", nullable=False)
 
+
+class Publication(PublicationFields, table=True):
+    __tablename__ = "publication"
+    # Индексы повторяют комбинации фильтров ленты и заканчиваются ключом курсора (created_at, id)
+    __table_args__ = (
+        Index("ix_publication_listing", "is_offer", "created_at", "id", **ACTIVE_ONLY),
+        Index("ix_publication_listing_university", "is_offer", "university", "created_at", "id", **ACTIVE_ONLY),
+        Index(
+            "ix_publication_listing_university_faculty",
+            "is_offer", "university", "faculty", "created_at", "id",
+            **ACTIVE_ONLY,
+        ),
+        Index("ix_publication_listing_subject", "is_offer", "subject", "created_at", "id", **ACTIVE_ONLY),
+        Index("ix_publication_author", "author_id", "is_active", "created_at", "id"),
+        # Очередь архиватора: только скрытые публикации, по времени скрытия
+        Index("ix_publication_deactivated", "deactivated_at", **INACTIVE_ONLY),
+        # Полнотекстовый поиск в Postgres идёт по GIN-индексу на выражении tsvector
+        Index(
+            "ix_publication_search",
+            text(SEARCH_DOCUMENT_SQL),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        # id архивированных публикаций не должен достаться новым: в SQLite нужен AUTOINCREMENT
+        {"sqlite_autoincrement": True},
+    )
+
     author: Optional["UserTable"] = Relationship(back_populates="publications")
+
+
+class PublicationArchive(PublicationFields, table=True):
+    """Холодное хранилище: публикации, скрытые дольше ARCHIVE_AFTER_DAYS. id сохраняется."""
+    __tablename__ = "publication_archive"
+    __table_args__ = (
+        # Статистика профиля учитывает и архив
+        Index("ix_publication_archive_author", "author_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": False})
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+    author: Optional["UserTable"] = Relationship()
+
+
+# В SQLite полнотекстовый индекс — отдельная FTS5-таблица с rowid = publication.id,
+# её поддерживают функции из app.crud.search
+event.listen(
+    Publication.__table__,
+    "after_create",
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS publication_fts "
+        "USING fts5(title, description, tokenize='unicode61 remove_diacritics 2')"
+    ).execute_if(dialect="sqlite"),
+)
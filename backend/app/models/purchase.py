@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Index, UniqueConstraint
+from sqlmodel import SQLModel, Field
+
+
+class Purchase(SQLModel, table=True):
+    __tablename__ = "purchase"
+    __table_args__ = (
+        # Повтор запроса с тем же Idempotency-Key упирается в ограничение, а не создаёт вторую покупку.
+        # Покупки без ключа (NULL) друг другу не мешают
+        UniqueConstraint("buyer_id", "idempotency_key", name="uq_purchase_buyer_idempotency_key"),
+        Index("ix_purchase_publication", "publication_id", "created_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Без внешнего ключа: публикация может переехать в publication_archive с тем же id
+    publication_id: int = Field(nullable=False)
+    buyer_id: int = Field(foreign_key="usertable.id", nullable=False)
+    price: float = Field(nullable=False, description="Цена на момент покупки")
+    idempotency_key: Optional[str] = Field(default=None, nullable=True, max_length=255)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class RefreshToken(SQLModel, table=True):
+    __tablename__ = "refresh_token"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="usertable.id", nullable=False, index=True)
+    # sha256 от токена; сам токен есть только у клиента
+    token_hash: str = Field(nullable=False, unique=True, index=True, max_length=64)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(nullable=False)
+    revoked_at: Optional[datetime] = Field(default=None, nullable=True)
@@ -1,16 +1,22 @@
 # app/routers/auth.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.dependencies import get_session  # сессия БД + OAuth2 схема лежит тут
-from app.crud.user import get_user_by_email, create_user
+from app.dependencies import get_async_session  # сессия БД + OAuth2 схема лежит тут
+from app.crud.user import get_user_by_email_async, create_user_async
+from app.crud.refresh_token import (
+    issue_refresh_token_async,
+    revoke_refresh_token_async,
+    rotate_refresh_token_async,
+)
 from app.schemas.user_create import UserCreate
 from app.schemas.user_public import UserPublic
-from app.schemas.token import Token
+from app.schemas.token import RefreshRequest, Token
+from app.utils.rate_limit import LOGIN_PER_EMAIL, LOGIN_PER_IP, REGISTER_PER_IP, client_ip, rate_limiter
 from app.utils.authentication import (
-    verify_password,
+    verify_password_async,
     create_access_token,
 )
 
@@ -22,37 +28,70 @@ router = APIRouter(prefix="/auth", tags=["auth"])
     response_model=UserPublic,
     status_code=status.HTTP_201_CREATED,
 )
-def register(
+async def register(
     user_in: UserCreate,
-    db: Session = Depends(get_session),
+    request: Request,
+    db: AsyncSession = Depends(get_async_session),
 ):
+    # Лимит проверяется до запросов к базе и хеширования
+    await rate_limiter.check(REGISTER_PER_IP, client_ip(request))
     # Проверяем, что email уникален
-    if get_user_by_email(db, user_in.email):
+    if await get_user_by_email_async(db, user_in.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    # Создаём пользователя (хеширование внутри create_user)
-    user = create_user(db, user_in)
+    # Создаём пользователя (хеширование в пуле процессов внутри create_user_async)
+    user = await create_user_async(db, user_in)
     return user
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ):
+    # Лимиты по адресу и по атакуемому email — до запросов к базе и bcrypt
+    await rate_limiter.check(LOGIN_PER_IP, client_ip(request))
+    await rate_limiter.check(LOGIN_PER_EMAIL, form_data.username.lower())
     # Находим юзера по email
-    user = get_user_by_email(db, form_data.username)
+    user = await get_user_by_email_async(db, form_data.username)
     # Проверяем пароль
     if not user:
         print("User not found")
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    # Генерируем JWT и возвращаем
+    # Генерируем JWT и refresh-токен: дальше клиент обновляет сессию через /auth/refresh, без bcrypt
     access_token = create_access_token(user.email)
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = await issue_refresh_token_async(db, user.id)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    body: RefreshRequest,
+    db: AsyncSession = Depends(get_async_session),
+):
+    rotated = await rotate_refresh_token_async(db, body.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    refresh_token, email = rotated
+    return {"access_token": create_access_token(email), "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: RefreshRequest,
+    db: AsyncSession = Depends(get_async_session),
+):
+    # Access-токен доживает свои минуты; отзывается только refresh-токен
+    await revoke_refresh_token_async(db, body.refresh_token)
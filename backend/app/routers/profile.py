@@ -1,22 +1,30 @@
+import contextlib
+import hashlib
 import os
-from uuid import uuid4
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+import tempfile
+from typing import Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, UploadFile, status
 from sqlmodel import Session
 
-from app.crud.profile import edit_profile_by_id, get_profile_by_id, update_user_avatar
-from app.crud.user import get_user_by_email
-from app.dependencies import get_session, oauth2_scheme
-from app.models.user import UserTable
+from app.crud.profile import edit_profile_by_id, get_profile_by_id, update_user_avatar, user_exists
+from app.crud.publication import get_publications_by_author
+from app.dependencies import get_read_session, get_session
 from app.routers.user import get_current_user
+from app.schemas.principal import Principal
+from app.schemas.publication import PublicationPage
 from app.schemas.user_profile import AvatarResponse, ProfileUpdate, UserProfile
-from app.utils.authentication import decode_access_token
+from app.schemas.user_public import UserPublic
+from app.utils.avatars import avatar_files, avatar_stem, avatar_url, avatar_variant_urls, render_avatar_variants
+from app.utils.pagination import build_page, decode_cursor
+from app.utils.serialization import json_response, page_json
+from app.utils.uploads import size_limited_route
 
 router = APIRouter(prefix="/profile", tags=["profile"])
 
 @router.get("/{user_id}", response_model=UserProfile, status_code=status.HTTP_200_OK)
 def read_user_profile(
     user_id: int,
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
 ):
     user = get_profile_by_id(db, user_id)
     if not user:
@@ -27,77 +35,129 @@ def read_user_profile(
     return user
 
 
+@router.get("/{user_id}/publications", response_model=PublicationPage, status_code=status.HTTP_200_OK)
+def read_user_publications(
+    user_id: int,
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_session),
+):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    rows = get_publications_by_author(db, user_id, after=after, limit=limit + 1)
+    items, next_cursor = build_page(rows, limit)
+    return json_response(page_json(items, next_cursor))
+
+
 
-@router.put("/{user_id}", status_code=status.HTTP_200_OK)
+@router.put("/{user_id}", response_model=UserPublic, status_code=status.HTTP_200_OK)
 def update_publication_endpoint(
     user_id: int,
     prof_in: ProfileUpdate,
-    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_session),
 ):
-    email = decode_access_token(token)
-
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    existing = get_profile_by_id(db, user_id)
-    if not existing:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
-    if existing.id != user.id:
+    # Править можно только свой профиль; к базе за 404/403 идём, только если id чужой
+    if user_id != current_user.id:
+        if not user_exists(db, user_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions to edit")
     updated = edit_profile_by_id(db, user_id, prof_in)
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return updated
 
 
 MAX_AVATAR_SIZE = 2 * 1024 * 1024
+# Запас на заголовки multipart поверх самого файла
+MAX_AVATAR_REQUEST_SIZE = MAX_AVATAR_SIZE + 64 * 1024
+AVATAR_CHUNK_SIZE = 64 * 1024
+AVATAR_DIR = os.path.join("static", "avatars")
+
+
+def _avatar_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image too large, max size is {MAX_AVATAR_SIZE // (1024*1024)} MB",
+    )
+
+
+def _receive_upload(file: UploadFile) -> Tuple[str, str]:
+    """Копирует загрузку во временный файл по частям; возвращает путь и sha256 содержимого."""
+    os.makedirs(AVATAR_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=AVATAR_DIR, prefix=".upload_")
+    digest = hashlib.sha256()
+    try:
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            while chunk := file.file.read(AVATAR_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_AVATAR_SIZE:
+                    raise _avatar_too_large()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest()
+
+
+def _remove_avatar_files(avatar_url: str) -> None:
+    for path in avatar_files(avatar_url, AVATAR_DIR):
+        with contextlib.suppress(OSError):
+            os.remove(path)
+
 
-@router.patch(
-    "/avatar",
-    response_model=AvatarResponse,
-)
 def upload_avatar(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_session),
-    current_user: UserTable = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not file.content_type.startswith("image/"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Need to send an image"
         )
-    
-    contents = file.file.read()
-    if len(contents) > MAX_AVATAR_SIZE:
+
+    tmp_path, digest = _receive_upload(file)
+    stem = avatar_stem(current_user.id, digest)
+    try:
+        render_avatar_variants(tmp_path, AVATAR_DIR, stem)
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"Image too large, max size is {MAX_AVATAR_SIZE // (1024*1024)} MB",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Need to send an image"
         )
+    finally:
+        os.remove(tmp_path)
 
-    if current_user.avatar:
-        old_filename = os.path.basename(current_user.avatar)
-        old_path = os.path.join("static", "avatars", old_filename)
-        if os.path.isfile(old_path):
-            try:
-                os.remove(old_path)
-            except OSError:
-                pass
-
-    ext = os.path.splitext(file.filename)[1]
-    filename = f"{current_user.id}_{uuid4().hex}{ext}"
-    save_dir = os.path.join("static", "avatars")
-    os.makedirs(save_dir, exist_ok=True)
-    file_path = os.path.join(save_dir, filename)
-
-    with open(file_path, "wb") as out:
-        out.write(contents)
-
-    avatar_url = f"/static/avatars/{filename}"
+    new_avatar_url = avatar_url(stem)
     
-    updated = update_user_avatar(db, current_user.id, avatar_url)
+    updated = update_user_avatar(db, current_user.id, new_avatar_url)
     if not updated:
+        _remove_avatar_files(new_avatar_url)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update avatar in database",
         )
 
-    return AvatarResponse(avatar=avatar_url)
\ No newline at end of file
+    # Старые файлы удаляем уже после ответа; та же картинка даёт те же имена файлов
+    _, previous_avatar = updated
+    if previous_avatar and previous_avatar != new_avatar_url:
+        background_tasks.add_task(_remove_avatar_files, previous_avatar)
+
+    return AvatarResponse(avatar=new_avatar_url, avatar_variants=avatar_variant_urls(new_avatar_url))
+
+
+# Тело запроса обрывается на лимите ещё во время разбора multipart
+router.add_api_route(
+    "/avatar",
+    upload_avatar,
+    methods=["PATCH"],
+    response_model=AvatarResponse,
+    route_class_override=size_limited_route(MAX_AVATAR_REQUEST_SIZE),
+)
@@ -1,109 +1,369 @@
-from typing import List, Optional
+import asyncio
+from typing import List, Optional, Union
 from typing_extensions import Literal
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.dependencies import get_session, oauth2_scheme
-from app.routers.user import get_current_user
-from app.schemas.publication import PublicationCreate, PublicationRead, PublicationStateUpdate, PublicationUpdate
-from app.crud.publication import delete_publication_by_id, get_publications, get_publication_by_id, create_publication, edit_publication_by_id, update_publication_state
-from app.utils.authentication import decode_access_token
-
-from app.crud.user import get_user_by_email
+from app.dependencies import (
+    FACETS_CACHE_SIZE,
+    FACETS_CACHE_TTL,
+    FEED_HEARTBEAT_SECONDS,
+    read_engine,
+    get_async_read_session,
+    get_session,
+)
+from app.routers.user import get_current_moderator, get_current_user
+from app.schemas.principal import Principal
+from app.schemas.purchase import PurchaseRead
+from app.schemas.publication import (
+    PublicationBatchCreate,
+    PublicationBatchStateUpdate,
+    PublicationCompactPage,
+    PublicationCreate,
+    PublicationFacets,
+    PublicationPage,
+    PublicationRead,
+    PublicationStateUpdate,
+    PublicationUpdate,
+)
+from app.crud.publication import (
+    EXPORT_COLUMNS,
+    create_publication,
+    create_publications,
+    delete_publication_by_id,
+    edit_publication_by_id,
+    get_facet_counts_async,
+    get_publication_by_id,
+    get_publication_by_id_async,
+    get_publication_owners,
+    get_publications_async,
+    iter_publications_for_export,
+    publication_exists,
+    purchase_publication,
+    search_publications_async,
+    update_publication_state,
+    update_publications_state,
+)
+from app.utils.cache import TTLCache
+from app.utils.export import csv_chunks, ndjson_chunks
+from app.utils.feed import FeedFilter, publication_broker
+from app.utils.pagination import build_page, build_search_page, decode_cursor, decode_offset_cursor
+from app.utils.response_cache import cached_json_response, response_cache
+from app.utils.serialization import compact_page_json, json_response, own_publication_json, page_json
 
 router = APIRouter(prefix="/publications", tags=["publications"])
 
+facets_cache = TTLCache(maxsize=FACETS_CACHE_SIZE, ttl=FACETS_CACHE_TTL)
+
 
-@router.get("/", response_model=List[PublicationRead])
-def read_publications(
+@router.get("/", response_model=Union[PublicationPage, PublicationCompactPage])
+async def read_publications(
+    request: Request,
     tab: Literal["need", "help"] = Query(..., description="need=requests, help=offers"),
     university: Optional[str] = Query(None),
     faculty: Optional[str] = Query(None),
     subject: Optional[str] = Query(None),
-    db: Session = Depends(get_session),
+    q: Optional[str] = Query(None, description="Полнотекстовый поиск по названию и описанию"),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    limit: int = Query(100, ge=1, le=100),
+    format: Literal["full", "compact"] = Query("full", description="compact: авторы отдельным словарём authors"),
+    db: AsyncSession = Depends(get_async_read_session),
+):
+    is_offer = tab == "help"
+    university, faculty, subject = university or None, faculty or None, subject or None
+    q = " ".join(q.split()) if q else None
+
+    key = ("list", is_offer, university, faculty, subject, q, cursor, limit, format)
+    cached = response_cache.get(key)
+    if cached:
+        return cached_json_response(request, cached)
+    version = response_cache.version(key)
+
+    try:
+        if q:
+            offset = decode_offset_cursor(cursor) if cursor else 0
+        else:
+            after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if q:
+        rows = await search_publications_async(db, q, is_offer, university, faculty, subject, offset=offset, limit=limit + 1)
+        items, next_cursor = build_search_page(rows, offset, limit)
+    else:
+        rows = await get_publications_async(db, is_offer, university, faculty, subject, after=after, limit=limit + 1)
+        items, next_cursor = build_page(rows, limit)
+
+    body = compact_page_json(items, next_cursor) if format == "compact" else page_json(items, next_cursor)
+    entry = response_cache.put(key, body, authors={p.author_id for p in items}, version=version)
+    return cached_json_response(request, entry)
+
+
+# Роуты с фиксированным путём объявлены до /{publication_id}, иначе /facets и /batch уйдут в роуты по id
+@router.get("/facets", response_model=PublicationFacets)
+async def read_publication_facets(
+    tab: Literal["need", "help"] = Query(..., description="need=requests, help=offers"),
+    university: Optional[str] = Query(None),
+    faculty: Optional[str] = Query(None),
+    subject: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_read_session),
 ):
     is_offer = tab == "help"
-    return get_publications(db, is_offer, university, faculty, subject)
+    key = (is_offer, university or None, faculty or None, subject or None)
+    body = facets_cache.get(key)
+    if body is None:
+        counts = await get_facet_counts_async(db, *key)
+        facets = PublicationFacets.model_validate(
+            {facet: [{"value": value, "count": count} for value, count in values] for facet, values in counts.items()}
+        )
+        body = facets.model_dump_json().encode()
+        facets_cache.set(key, body)
+    return json_response(body)
+
+
+@router.get("/export")
+def export_publications(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    tab: Optional[Literal["need", "help"]] = Query(None, description="Без tab — и предложения, и запросы"),
+    university: Optional[str] = Query(None),
+    faculty: Optional[str] = Query(None),
+    subject: Optional[str] = Query(None),
+    include_inactive: bool = Query(False, description="Вместе со скрытыми и архивными"),
+    moderator: Principal = Depends(get_current_moderator),
+):
+    """Потоковая выгрузка для аналитики и модерации; память не зависит от числа строк.
+
+    Только для модераторов: выгрузка отдаёт всю таблицу, в том числе скрытые публикации.
+    """
+    is_offer = None if tab is None else tab == "help"
+    encode = csv_chunks if format == "csv" else ndjson_chunks
+
+    def body():
+        # Своя сессия: сессия из Depends закрывается раньше, чем StreamingResponse дочитает генератор
+        with Session(read_engine) as db:
+            batches = iter_publications_for_export(
+                db, is_offer, university or None, faculty or None, subject or None, include_inactive
+            )
+            yield from encode(batches, EXPORT_COLUMNS)
+
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="publications.{format}"'},
+    )
+
+
+@router.get("/stream")
+async def stream_publications(
+    request: Request,
+    tab: Literal["need", "help"] = Query(..., description="need=requests, help=offers"),
+    university: Optional[str] = Query(None),
+    faculty: Optional[str] = Query(None),
+    subject: Optional[str] = Query(None),
+):
+    """Server-Sent Events: created / updated / deleted по публикациям, попадающим в фильтр."""
+    subscription = publication_broker.subscribe(
+        FeedFilter(tab == "help", university or None, faculty or None, subject or None)
+    )
+
+    async def events():
+        try:
+            while True:
+                try:
+                    event = await subscription.get(timeout=FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield b": ping\n\n"
+                    continue
+                if event is None:
+                    # Отстал или сервер останавливается: клиент переподключится и перечитает ленту
+                    return
+                yield b"event: " + event.kind.encode() + b"\ndata: " + event.data + b"\n\n"
+        finally:
+            publication_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _wait_closed(websocket: WebSocket) -> None:
+    # Клиент в ленту ничего не пишет; читаем только, чтобы заметить закрытие
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/ws")
+async def publications_websocket(
+    websocket: WebSocket,
+    tab: Literal["need", "help"] = Query(...),
+    university: Optional[str] = Query(None),
+    faculty: Optional[str] = Query(None),
+    subject: Optional[str] = Query(None),
+):
+    """То же, что /stream, по WebSocket: сообщения {"type": ..., "data": ...}."""
+    await websocket.accept()
+    subscription = publication_broker.subscribe(
+        FeedFilter(tab == "help", university or None, faculty or None, subject or None)
+    )
+    closed = asyncio.create_task(_wait_closed(websocket))
+    try:
+        while True:
+            next_event = asyncio.create_task(subscription.get())
+            await asyncio.wait({closed, next_event}, return_when=asyncio.FIRST_COMPLETED)
+            if closed.done():
+                next_event.cancel()
+                return
+            event = next_event.result()
+            if event is None:
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            await websocket.send_text(f'{{"type": "{event.kind}", "data": {event.data.decode()}}}')
+    finally:
+        closed.cancel()
+        publication_broker.unsubscribe(subscription)
+
+
+@router.post("/batch", response_model=List[PublicationRead], status_code=status.HTTP_201_CREATED)
+def create_publications_batch(
+    batch: PublicationBatchCreate,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_session),
+):
+    return create_publications(db, batch.items, author_id=current_user.id)
+
+
+@router.patch("/batch", response_model=List[PublicationRead], status_code=status.HTTP_200_OK)
+def patch_publications_state_batch(
+    batch: PublicationBatchStateUpdate,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_session),
+):
+    ids = sorted(set(batch.ids))
+    owners = get_publication_owners(db, ids)
+    missing = [pub_id for pub_id in ids if pub_id not in owners]
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Publications not found: {missing}")
+    if any(author_id != current_user.id for author_id in owners.values()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions to update state")
+
+    return update_publications_state(db, ids, batch.is_active)
 
 
 @router.get("/{publication_id}", response_model=PublicationRead, status_code=status.HTTP_200_OK)
-def read_publication_by_id_endpoint(publication_id: int, db: Session = Depends(get_session)):
-    publication = get_publication_by_id(db, publication_id)
+async def read_publication_by_id_endpoint(
+    publication_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_session),
+):
+    key = ("detail", publication_id)
+    cached = response_cache.get(key)
+    if cached:
+        return cached_json_response(request, cached)
+    version = response_cache.version(key)
+
+    publication = await get_publication_by_id_async(db, publication_id)
     if not publication:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Publication not found",
         )
-    return publication
+    body = PublicationRead.model_validate(publication).model_dump_json().encode()
+    entry = response_cache.put(key, body, authors={publication.author_id}, version=version)
+    return cached_json_response(request, entry)
+
+
 
+def _write_rejected(db: Session, publication_id: int, action: str) -> HTTPException:
+    # Запись не затронула ни одной строки: лишний SELECT только здесь, чтобы отличить 404 от 403
+    if publication_exists(db, publication_id):
+        return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not enough permissions to {action}")
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
 
 
 @router.post("/", response_model=PublicationRead, status_code=status.HTTP_201_CREATED)
 def create_publication_endpoint(
     pub_in: PublicationCreate,
-    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_session)
 ):
-    email = decode_access_token(token)
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return create_publication(db, pub_in, author_id=user.id)
+    pub = create_publication(db, pub_in, author_id=current_user.id)
+    return json_response(own_publication_json(pub, current_user), status_code=status.HTTP_201_CREATED)
 
 
 @router.delete("/{publication_id}/", status_code=status.HTTP_204_NO_CONTENT)
 def delete_publication_by_id_endpoint(
     publication_id: int,
-    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_session),
 ):
-    publication = get_publication_by_id(db, publication_id)
-    if not publication:
+    if delete_publication_by_id(db, publication_id, author_id=current_user.id):
+        return
+    pub = get_publication_by_id(db, publication_id)
+    if not pub:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
-
-    if publication.author_id != get_current_user(token, db).id:
+    if pub.author_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions to delete")
-
-    delete_publication_by_id(db, publication)
+    # Купленную публикацию не удаляем, чтобы не потерять историю покупок: её можно только скрыть
+    if pub.bought:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Publication has purchases, deactivate it instead")
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Publication is archived")
 
 
 @router.put("/{publication_id}", response_model=PublicationRead, status_code=status.HTTP_200_OK)
 def update_publication_endpoint(
     publication_id: int,
     pub_in: PublicationUpdate,
-    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_session),
 ):
-    email = decode_access_token(token)
-
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    existing = get_publication_by_id(db, publication_id)
-    if not existing:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
-    if existing.author_id != user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions to edit")
-    updated = edit_publication_by_id(db, publication_id, pub_in)
-    return updated
+    updated = edit_publication_by_id(db, publication_id, current_user.id, pub_in)
+    if not updated:
+        raise _write_rejected(db, publication_id, "edit")
+    return json_response(own_publication_json(updated, current_user))
 
 
 @router.patch("/{publication_id}", response_model=PublicationRead, status_code=status.HTTP_200_OK)
 def patch_publication_state(
     publication_id: int,
     state: PublicationStateUpdate,
-    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_session),
 ):
-    email = decode_access_token(token)
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    pub = get_publication_by_id(db, publication_id)
-    if not pub:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
-    if pub.author_id != user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions to update state")
+    updated = update_publication_state(db, publication_id, current_user.id, state.is_active)
+    if not updated:
+        raise _write_rejected(db, publication_id, "update state")
+    return json_response(own_publication_json(updated, current_user))
 
-    updated = update_publication_state(db, publication_id, state.is_active)
-    return updated
+
+@router.post("/{publication_id}/purchase", response_model=PurchaseRead, status_code=status.HTTP_201_CREATED)
+def purchase_publication_endpoint(
+    publication_id: int,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Повтор с тем же ключом не создаёт новую покупку"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_session),
+):
+    purchase, created = purchase_publication(db, publication_id, current_user.id, idempotency_key)
+    if purchase is None:
+        pub = get_publication_by_id(db, publication_id)
+        if not pub:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Publication not found")
+        if pub.author_id == current_user.id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot purchase your own publication")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Publication is not active")
+    if not created:
+        if purchase.publication_id != publication_id:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency key was already used for another publication",
+            )
+        response.status_code = status.HTTP_200_OK
+        response.headers["Idempotent-Replayed"] = "true"
+    return purchase
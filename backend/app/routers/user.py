@@ -6,12 +6,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
 
 from app.crud.publication import get_publications_by_author
-from app.dependencies import get_session, oauth2_scheme
-from app.crud.user import get_user_by_email, get_my_publications, get_user_by_id
+from app.dependencies import MODERATOR_EMAILS, get_read_session, get_session, oauth2_scheme
+from app.crud.user import get_principal_by_email, get_my_publications, get_user_by_id
 
+from app.schemas.principal import Principal
 from app.schemas.publication import PublicationRead
 from app.schemas.user_public import UserPublic
 from app.utils.authentication import decode_access_token
+from app.utils.serialization import json_response, publications_json
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -19,9 +21,10 @@ router = APIRouter(prefix="/users", tags=["users"])
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_session),
-):
+) -> Principal:
+    """Общая зависимость для авторизованных роутов; пользователь берётся из кэша."""
     email = decode_access_token(token)
-    user = get_user_by_email(db, email)
+    user = get_principal_by_email(db, email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,6 +32,16 @@ def get_current_user(
         )
     return user
 
+
+def get_current_moderator(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """Роуты модерации: пользователь из MODERATOR_EMAILS."""
+    if current_user.email.lower() not in MODERATOR_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Moderator access required",
+        )
+    return current_user
+
 @router.get("/me", response_model=UserPublic)
 def read_users_me(current_user = Depends(get_current_user)):
     return current_user
@@ -37,16 +50,16 @@ def read_users_me(current_user = Depends(get_current_user)):
 @router.get("/me/publications", response_model=List[PublicationRead])
 def read_own_publications(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
 ):
     publications = get_publications_by_author(db, current_user.id)
-    return publications
+    return json_response(publications_json(publications))
 
 
 @router.get("/me/publications", response_model=List[PublicationRead])
 def read_own_publications(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
 ):
     publications = get_my_publications(db, current_user.id)
-    return publications
+    return json_response(publications_json(publications))
@@ -0,0 +1,16 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class Principal(BaseModel):
+    """Аутентифицированный пользователь без секретов; кэшируется между запросами."""
+    id: int
+    email: str
+    name: str
+    university: str
+    bio: Optional[str] = None
+    avatar: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
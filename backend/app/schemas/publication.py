@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
 from app.schemas.user_public import UserPublic
 
@@ -15,7 +15,15 @@ class PublicationCreate(BaseModel):
     description: str
 
 
-class PublicationRead(BaseModel):
+# Пачка пишется одной транзакцией; ограничение держит её короткой
+MAX_BATCH_SIZE = 100
+
+
+class PublicationBatchCreate(BaseModel):
+    items: List[PublicationCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class PublicationBase(BaseModel):
     id: int
     is_offer: bool
     title: str
@@ -27,12 +35,42 @@ class PublicationRead(BaseModel):
     bought: int
     is_active: bool
     created_at: datetime
-    author: UserPublic
 
     class Config:
         from_attributes = True
 
 
+class PublicationRead(PublicationBase):
+    author: UserPublic
+
+
+class PublicationCompact(PublicationBase):
+    author_id: int
+
+
+class PublicationPage(BaseModel):
+    items: List[PublicationRead]
+    next_cursor: Optional[str] = None
+
+
+class PublicationCompactPage(BaseModel):
+    """Компактная лента: каждый автор один раз в authors, в публикациях только author_id."""
+    items: List[PublicationCompact]
+    authors: Dict[int, UserPublic]
+    next_cursor: Optional[str] = None
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class PublicationFacets(BaseModel):
+    university: List[FacetCount]
+    faculty: List[FacetCount]
+    subject: List[FacetCount]
+
+
 class PublicationUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -41,3 +79,8 @@ class PublicationUpdate(BaseModel):
 
 class PublicationStateUpdate(BaseModel):
     is_active: bool
+
+
+class PublicationBatchStateUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    is_active: bool
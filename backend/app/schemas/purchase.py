@@ -0,0 +1,13 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class PurchaseRead(BaseModel):
+    id: int
+    publication_id: int
+    buyer_id: int
+    price: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,11 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
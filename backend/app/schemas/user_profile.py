@@ -1,38 +1,19 @@
 from datetime import datetime
-from typing import List
-from pydantic import BaseModel, computed_field
+from typing import Dict, Optional
+from pydantic import BaseModel
 
 from app.schemas.user_public import UserPublic
-from app.schemas.publication import PublicationRead
 
 class UserProfile(UserPublic):
+    """Шапка профиля. Публикации пользователя отдаются отдельно: GET /profile/{id}/publications."""
     created_at: datetime
-    publications: List[PublicationRead] = []
-
-    @computed_field
-    @property
-    def active_offers(self) -> int:
-        return sum(1 for p in self.publications if p.is_offer)
-
-    @computed_field
-    @property
-    def active_requests(self) -> int:
-        return sum(1 for p in self.publications if not p.is_offer)
-
-    @computed_field
-    @property
-    def helped(self) -> int:
-        return 5
-
-    @computed_field
-    @property
-    def got_help(self) -> int:
-        return 4
-
-    @computed_field
-    @property
-    def rating(self) -> float:
-        return 4.8
+    active_offers: int = 0
+    active_requests: int = 0
+    # Сколько раз купили предложения пользователя / откликнулись на его запросы
+    helped: int = 0
+    got_help: int = 0
+    # Отзывов пока нет, рейтинг появится вместе с ними
+    rating: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -47,4 +28,5 @@ class ProfileUpdate(BaseModel):
 
 
 class AvatarResponse(BaseModel):
-    avatar: str
\ No newline at end of file
+    avatar: str
+    avatar_variants: Dict[str, str] = {}
\ No newline at end of file
@@ -1,4 +1,7 @@
-from pydantic import BaseModel, field_validator
+from typing import Dict
+from pydantic import BaseModel, computed_field, field_validator
+
+from app.utils.avatars import avatar_variant_urls
 
 class UserPublic(BaseModel):
     id: int
@@ -11,5 +14,11 @@ class UserPublic(BaseModel):
     def _none_to_empty(cls, v):
         return v or ""
 
+    @computed_field
+    @property
+    def avatar_variants(self) -> Dict[str, str]:
+        """URL превью аватара по размеру ("48", "128", "256")."""
+        return avatar_variant_urls(self.avatar)
+
     class Config:
         from_attributes = True
\ No newline at end of file
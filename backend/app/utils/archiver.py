@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from sqlmodel import Session
+
+from app.crud.archive import archive_inactive_publications
+from app.dependencies import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL_SECONDS, engine
+
+logger = logging.getLogger(__name__)
+
+_task: Optional["asyncio.Task[None]"] = None
+
+
+def archive_pass(older_than: timedelta = timedelta(days=ARCHIVE_AFTER_DAYS), batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Переносит в архив всё, что накопилось, пачками по batch_size — каждая в своей транзакции."""
+    total = 0
+    while True:
+        with Session(engine) as db:
+            moved = archive_inactive_publications(db, older_than, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+async def _run() -> None:
+    while True:
+        try:
+            # Синхронный движок: проход идёт в потоке, event loop не блокируется
+            moved = await asyncio.to_thread(archive_pass)
+            if moved:
+                logger.info("Archived %d inactive publications", moved)
+        except Exception:
+            logger.exception("Publication archiving failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+
+def start_archiver() -> None:
+    global _task
+    if _task is None:
+        _task = asyncio.get_running_loop().create_task(_run())
+
+
+async def stop_archiver() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
@@ -1,19 +1,98 @@
+import asyncio
+import hashlib
+import multiprocessing
+import secrets
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Optional, Tuple
 import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 from fastapi import HTTPException, status
 
-from app.dependencies import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.dependencies import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_QUEUE_LIMIT,
+    PASSWORD_HASH_RETRY_AFTER,
+    PASSWORD_HASH_WORKERS,
+)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    # passlib и bcrypt грузятся при первом хешировании, а не при старте воркера
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+_password_pool: Optional[ProcessPoolExecutor] = None
+_password_jobs = 0
+
+
+def _pool_context():
+    # fork из процесса с потоками (uvicorn, aiosqlite) может унести в дочерний процесс
+    # захваченную кем-то блокировку; forkserver/spawn стартуют чистый интерпретатор
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def start_password_pool() -> None:
+    """Создаёт пул при старте приложения и сразу поднимает процессы, чтобы первый вход их не ждал."""
+    global _password_pool
+    if _password_pool is not None:
+        return
+    _password_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, mp_context=_pool_context())
+    for _ in range(PASSWORD_HASH_WORKERS):
+        _password_pool.submit(get_pwd_context)
+
+
+def _get_password_pool() -> ProcessPoolExecutor:
+    # Вне приложения (скрипты) startup не вызывается — тогда пул создаётся здесь
+    if _password_pool is None:
+        start_password_pool()
+    return _password_pool
+
+
+async def _run_password_job(func, *args):
+    # Счётчик трогается только из event loop, поэтому блокировка не нужна
+    global _password_jobs
+    if _password_jobs >= PASSWORD_HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+        )
+    _password_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_pool(), func, *args)
+    finally:
+        _password_jobs -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+def shutdown_password_pool() -> None:
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(cancel_futures=True)
+        _password_pool = None
+
 
 def create_access_token(subject: str) -> str:
     to_encode = {"sub": subject}
@@ -21,6 +100,19 @@ def create_access_token(subject: str) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_refresh_token() -> Tuple[str, str]:
+    """(токен для клиента, его хеш для базы).
+
+    Токен случайный и длинный, перебором его не подобрать, поэтому хватает
+    быстрого sha256 — bcrypt здесь только тратил бы CPU.
+    """
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def decode_access_token(token: str) -> Optional[str]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
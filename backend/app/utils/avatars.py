@@ -0,0 +1,82 @@
+import contextlib
+import os
+import re
+import tempfile
+from typing import Dict, List
+
+# Превью, которые генерируются при загрузке; UI берёт подходящий размер вместо оригинала
+AVATAR_SIZES = (48, 128, 256)
+AVATAR_DEFAULT_SIZE = 256
+AVATAR_QUALITY = 80
+# Защита от «бомб»: картинка больше этого числа пикселей не декодируется
+AVATAR_MAX_PIXELS = 40_000_000
+
+# {user_id}_{sha256 исходника}_{size}.webp — имя меняется вместе с содержимым
+_VARIANT_RE = re.compile(r"^(?P<stem>.*\d+_[0-9a-f]{32})_(?P<size>\d+)\.webp$")
+
+
+def avatar_stem(user_id: int, digest: str) -> str:
+    return f"{user_id}_{digest[:32]}"
+
+
+def variant_name(stem: str, size: int) -> str:
+    return f"{stem}_{size}.webp"
+
+
+def render_avatar_variants(source_path: str, dest_dir: str, stem: str) -> None:
+    """Генерирует квадратные WebP-превью всех размеров. ValueError, если это не картинка."""
+    # Pillow тяжёлый, импортируем только когда реально обрабатываем загрузку
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    largest = max(AVATAR_SIZES)
+    try:
+        with Image.open(source_path) as img:
+            # Глобальный Image.MAX_IMAGE_PIXELS не трогаем: open читает только заголовок,
+            # размер проверяется до декодирования
+            width, height = img.size
+            if width * height > AVATAR_MAX_PIXELS:
+                raise ValueError("Image is too large")
+            # JPEG декодируется сразу в уменьшенном масштабе (1/2…1/8), не меньше самого крупного превью
+            img.draft("RGB", (largest, largest))
+            img = ImageOps.exif_transpose(img)
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            # Остальные форматы грубо ужимаем целым шагом, LANCZOS доводит уже маленькую картинку
+            factor = min(img.size) // largest
+            if factor > 1:
+                img = img.reduce(factor)
+            for size in AVATAR_SIZES:
+                variant = ImageOps.fit(img, (size, size), method=Image.Resampling.LANCZOS)
+                _save_atomic(variant, os.path.join(dest_dir, variant_name(stem, size)))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError("Invalid image") from e
+
+
+def _save_atomic(image, path: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".variant_")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            image.save(out, format="WEBP", quality=AVATAR_QUALITY, method=6)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def avatar_url(stem: str, size: int = AVATAR_DEFAULT_SIZE) -> str:
+    return f"/static/avatars/{variant_name(stem, size)}"
+
+
+def avatar_variant_urls(url: str) -> Dict[str, str]:
+    """URL всех превью по сохранённому avatar; для старых аватаров без превью — пусто."""
+    match = _VARIANT_RE.match(url or "")
+    if not match:
+        return {}
+    prefix = match.group("stem")
+    return {str(size): f"{prefix}_{size}.webp" for size in AVATAR_SIZES}
+
+
+def avatar_files(url: str, avatar_dir: str) -> List[str]:
+    """Файлы на диске, которые принадлежат аватару (все превью или один старый файл)."""
+    urls = list(avatar_variant_urls(url).values()) or [url]
+    return [os.path.join(avatar_dir, os.path.basename(u)) for u in urls]
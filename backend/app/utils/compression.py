@@ -0,0 +1,144 @@
+import gzip
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него отдаём gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "image/svg+xml", "application/javascript")
+
+
+def supported_encodings() -> List[str]:
+    """Кодировки в порядке предпочтения сервера."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Разбирает Accept-Encoding в {кодировка: q}; q=0 означает явный отказ."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str, available: List[str]) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in available:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """gzip/brotli для ответов API, которые отдаются одним куском и не меньше minimum_size.
+
+    Решение пропустить ответ как есть принимается по http.response.start, и тогда заголовки
+    уходят сразу: потоковые ответы (SSE, выгрузки) не ждут первого куска, а частичные (206),
+    уже сжатые и не-200 ответы не трогаются. Статика под passthrough_prefixes отдаётся заранее сжатой — см. ImmutableStaticFiles.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        gzip_level: int,
+        brotli_quality: int,
+        passthrough_prefixes: Tuple[str, ...] = ("/static",),
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.passthrough_prefixes = passthrough_prefixes
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _skip_path(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.passthrough_prefixes)
+
+    @staticmethod
+    def _skip_response(start: Message, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            start["status"] != 200
+            # Без Content-Length тело потоковое (SSE, выгрузки): буферизовать его нельзя
+            or "content-length" not in headers
+            or "content-range" in headers
+            or "content-encoding" in headers
+            or content_type.startswith("text/event-stream")
+            or not is_compressible(content_type)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._skip_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), supported_encodings())
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if self._skip_response(message, headers):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Дальше тело зависит от Accept-Encoding, даже если этот клиент сжатие не принимает
+                headers.add_vary_header("Accept-Encoding")
+                if encoding is None:
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                return
+
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            # Страховка для ответа, который всё же пришёл несколькими кусками
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Сжатое представление побайтно другое: сильный ETag становится слабым, как у nginx
+                headers["ETag"] = "W/" + etag
+            passthrough = True
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,34 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, Sequence
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def ndjson_chunks(batches: Iterable[Sequence], columns: Sequence[str]) -> Iterator[bytes]:
+    """Одна JSON-строка на запись; на выход — по куску на пачку, а не на строку."""
+    for batch in batches:
+        lines = [json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) for row in batch]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def csv_chunks(batches: Iterable[Sequence], columns: Sequence[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in batch
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Пустая выгрузка: только заголовок
+        yield buffer.getvalue().encode()
@@ -0,0 +1,109 @@
+import asyncio
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Set
+
+from app.dependencies import FEED_QUEUE_SIZE
+
+
+@dataclass(frozen=True)
+class FeedFilter:
+    """Тот же фильтр, что у GET /publications/: пустые поля ничего не ограничивают."""
+    is_offer: bool
+    university: Optional[str] = None
+    faculty: Optional[str] = None
+    subject: Optional[str] = None
+
+    def matches(self, is_offer: bool, university: str, faculty: str, subject: str) -> bool:
+        return (
+            self.is_offer == is_offer
+            and self.university in (None, university)
+            and self.faculty in (None, faculty)
+            and self.subject in (None, subject)
+        )
+
+
+@dataclass(frozen=True)
+class FeedEvent:
+    kind: str  # created | updated | deleted
+    data: bytes  # готовый JSON: сериализуется один раз на все подписки
+
+
+class Subscription:
+    """Очередь одного клиента. Живёт в event loop, в котором подписались."""
+
+    def __init__(self, feed_filter: FeedFilter, maxsize: int) -> None:
+        self.filter = feed_filter
+        self.dropped = False
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[Optional[FeedEvent]]" = asyncio.Queue(maxsize=maxsize)
+
+    def _offer(self, event: Optional[FeedEvent]) -> None:
+        if self.dropped:
+            return
+        if event is None:
+            self.dropped = True
+        else:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except asyncio.QueueFull:
+                # Клиент не успевает читать: отключаем его, а не копим события и не тормозим запись
+                self.dropped = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    def offer(self, event: Optional[FeedEvent]) -> None:
+        # Писатели — sync-роуты из threadpool, поэтому в очередь кладём через loop подписчика
+        try:
+            self._loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            # loop уже закрыт — клиента больше нет
+            self.dropped = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[FeedEvent]:
+        """Следующее событие; None — подписка закрыта. asyncio.TimeoutError, если событий не было."""
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+
+class PublicationBroker:
+    """Рассылка изменений публикаций подписчикам живой ленты внутри процесса.
+
+    Каждый воркер uvicorn рассылает только свои записи; для нескольких воркеров
+    нужен общий канал (например, Redis pub/sub) поверх того же интерфейса.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subscriptions: Set[Subscription] = set()
+        self._lock = Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def subscribe(self, feed_filter: FeedFilter) -> Subscription:
+        subscription = Subscription(feed_filter, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: FeedEvent, is_offer: bool, university: str, faculty: str, subject: str) -> None:
+        with self._lock:
+            targets = [s for s in self._subscriptions if s.filter.matches(is_offer, university, faculty, subject)]
+        for subscription in targets:
+            subscription.offer(event)
+
+    def close_all(self) -> None:
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, set()
+        for subscription in subscriptions:
+            subscription.offer(None)
+
+
+publication_broker = PublicationBroker(queue_size=FEED_QUEUE_SIZE)
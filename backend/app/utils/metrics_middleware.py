@@ -0,0 +1,64 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import (
+    RequestStats,
+    current_request_stats,
+    db_queries_per_request,
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+
+
+def _route_label(scope: Scope) -> str:
+    # Шаблон пути, а не сам путь: иначе каждый /publications/{id} стал бы отдельной серией
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unknown")
+    root_path = scope.get("root_path", "")
+    if root_path:
+        return root_path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Латентность, число запросов в работе и SQL на запрос; итог отдаётся в заголовке Server-Timing."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                app_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'app;dur={app_ms:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_queries} queries"',
+                )
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            current_request_stats.reset(token)
+            method, route = scope["method"], _route_label(scope)
+            http_request_duration_seconds.observe(time.perf_counter() - started, method, route)
+            http_requests_total.inc(method, route, str(status_code))
+            db_queries_per_request.observe(stats.db_queries, method, route)
@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, TypeVar
+
+from app.models.publication import Publication
+
+T = TypeVar("T", bound=Publication)
+
+Cursor = Tuple[datetime, int]
+
+
+def _encode(payload) -> str:
+    raw = json.dumps(payload)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(publication: Publication) -> str:
+    """Непрозрачный курсор на позицию (created_at, id) в ленте."""
+    return _encode([publication.created_at.isoformat(), publication.id])
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        created_at, pub_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(pub_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """Курсор поисковой выдачи: результаты упорядочены по релевантности, а не по (created_at, id)."""
+    try:
+        offset = _decode(cursor)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def build_page(rows: Sequence[T], limit: int) -> Tuple[List[T], Optional[str]]:
+    """Ожидает limit + 1 строк: лишняя строка означает, что есть следующая страница."""
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+    return items, next_cursor
+
+
+def build_search_page(rows: Sequence[T], offset: int, limit: int) -> Tuple[List[T], Optional[str]]:
+    items = list(rows[:limit])
+    next_cursor = _encode(offset + limit) if len(rows) > limit else None
+    return items, next_cursor
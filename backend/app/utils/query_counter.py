@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(*engines: Engine) -> Iterator[QueryCounter]:
+    """Считает SQL-запросы, выполненные движками внутри блока.
+
+    Используется, чтобы проверить, что число запросов эндпоинта не растёт
+    вместе с размером выдачи (N+1)::
+
+        with count_queries(engine, read_engine) as counter:
+            client.get("/publications/?tab=help")
+        assert counter.count == 1
+
+    Один и тот же движок, переданный дважды, считается один раз.
+    """
+    counter = QueryCounter()
+    unique = list({id(engine): engine for engine in engines}.values())
+    for engine in unique:
+        event.listen(engine, "before_cursor_execute", counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        for engine in unique:
+            event.remove(engine, "before_cursor_execute", counter._before_cursor_execute)
@@ -0,0 +1,157 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Protocol, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.dependencies import (
+    LOGIN_RATE_PER_EMAIL,
+    LOGIN_RATE_PER_IP,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_REDIS_TIMEOUT,
+    RATE_LIMIT_REDIS_URL,
+    REGISTER_RATE_PER_IP,
+)
+from app.utils.metrics import rate_limit_backend_errors_total, rate_limited_total
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket: capacity попыток разом, дальше по refill_per_second."""
+    name: str
+    capacity: int
+    refill_per_second: float
+
+    @classmethod
+    def per_minute(cls, name: str, attempts: int) -> "RateLimit":
+        return cls(name, capacity=attempts, refill_per_second=attempts / 60)
+
+
+class RateLimitBackend(Protocol):
+    async def take(self, key: str, limit: RateLimit) -> float:
+        """Забирает токен. 0 — разрешено, иначе сколько секунд ждать."""
+        ...
+
+
+def _refill(tokens: float, updated_at: float, now: float, limit: RateLimit) -> Tuple[float, float]:
+    """(оставшиеся токены, ожидание) после попытки забрать один токен."""
+    tokens = min(limit.capacity, tokens + (now - updated_at) * limit.refill_per_second)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.refill_per_second
+
+
+class InMemoryBackend:
+    """Вёдра в памяти процесса; самые давние вытесняются, чтобы перебор IP не съел память."""
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (limit.capacity, now))
+            tokens, wait = _refill(tokens, updated_at, now, limit)
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# То же, что _refill, но атомарно на стороне Redis: воркеры не перезаписывают друг другу ведро
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Общие для всех воркеров вёдра. Подойдёт любой сервер с протоколом Redis, в том числе локальный.
+
+    Пока Redis недоступен, лимиты считает fallback в памяти процесса: вход не падает
+    с 500 и не остаётся совсем без ограничений.
+    """
+
+    def __init__(self, client, errors: Tuple[type, ...], fallback: RateLimitBackend) -> None:
+        self.client = client
+        self.errors = errors
+        self.fallback = fallback
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+        self._degraded = False
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = RATE_LIMIT_REDIS_TIMEOUT) -> "RedisBackend":
+        # redis — необязательная зависимость (requirements-optional.txt), нужна только этому бэкенду
+        from redis import asyncio as aioredis
+        from redis.exceptions import RedisError
+
+        client = aioredis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        return cls(client, errors=(RedisError,), fallback=InMemoryBackend())
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        try:
+            wait = await self._script(
+                keys=[f"ratelimit:{key}"],
+                args=[limit.capacity, limit.refill_per_second, time.time()],
+            )
+        except self.errors:
+            rate_limit_backend_errors_total.inc()
+            if not self._degraded:
+                self._degraded = True
+                logger.warning("Redis rate limiter unavailable, falling back to in-memory limits", exc_info=True)
+            return await self.fallback.take(key, limit)
+        if self._degraded:
+            self._degraded = False
+            logger.info("Redis rate limiter recovered")
+        return float(wait)
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend) -> None:
+        self.backend = backend
+
+    async def check(self, limit: RateLimit, key: str) -> None:
+        wait = await self.backend.take(f"{limit.name}:{key}", limit)
+        if wait > 0:
+            rate_limited_total.inc(limit.name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+def client_ip(request: Request) -> str:
+    # За прокси адрес клиента подставляет uvicorn --proxy-headers
+    return request.client.host if request.client else "unknown"
+
+
+LOGIN_PER_IP = RateLimit.per_minute("login_ip", LOGIN_RATE_PER_IP)
+LOGIN_PER_EMAIL = RateLimit.per_minute("login_email", LOGIN_RATE_PER_EMAIL)
+REGISTER_PER_IP = RateLimit.per_minute("register_ip", REGISTER_RATE_PER_IP)
+
+rate_limiter = RateLimiter(
+    RedisBackend.from_url(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_BACKEND == "redis" else InMemoryBackend()
+)
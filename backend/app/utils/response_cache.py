@@ -0,0 +1,149 @@
+import hashlib
+from dataclasses import dataclass
+from threading import Lock
+from typing import FrozenSet, Hashable, Optional, Protocol, Tuple
+
+from fastapi import Request, Response, status
+
+from app.dependencies import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    # Авторы, попавшие в ответ: правка профиля сбрасывает только их записи
+    authors: FrozenSet[int]
+
+
+class CacheBackend(Protocol):
+    def get(self, key: Hashable) -> Optional[CachedResponse]: ...
+
+    def set(self, key: Hashable, value: CachedResponse) -> None: ...
+
+    def delete(self, key: Hashable) -> None: ...
+
+    def delete_where(self, predicate) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class InMemoryLRUBackend(TTLCache):
+    pass
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class ResponseCache:
+    """Кэш сериализованных ответов публикаций.
+
+    Кэш у каждого процесса свой, инвалидация тоже: другие воркеры видят запись
+    только после RESPONSE_CACHE_TTL. Общий канал инвалидации — задача бэкенда
+    (CacheBackend), пока его нет.
+
+    Ключи:
+      ("list", is_offer, university, faculty, subject, q, cursor, limit, format)
+      ("detail", publication_id)
+    """
+
+    def __init__(self, backend: CacheBackend, versions_size: int = 4096, versions_ttl: float = 60) -> None:
+        self.backend = backend
+        # Версии областей: карточка — сам ключ, лента — ключ без q/cursor/limit/format.
+        # Ответ, посчитанный до инвалидации своей области, в кэш не попадает; чужие
+        # инвалидации (покупка другой публикации) заполнению не мешают
+        self._versions = TTLCache(maxsize=versions_size, ttl=versions_ttl)
+        # Значения берутся из одного счётчика и не повторяются, поэтому вытесненная
+        # версия (читается как 0) не совпадёт ни с одной выданной после сброса
+        self._counter = 0
+        # Правка профиля задевает ответы любых областей, она редкая — версия общая
+        self._authors_version = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def _scope(key: Hashable) -> Hashable:
+        return key[:5] if key[0] == "list" else key
+
+    def version(self, key: Hashable) -> Tuple[int, int]:
+        """Снимок версии до расчёта ответа; передаётся в put."""
+        with self._lock:
+            return self._versions.get(self._scope(key)) or 0, self._authors_version
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        return self.backend.get(key)
+
+    def put(self, key: Hashable, body: bytes, authors, version: Tuple[int, int]) -> CachedResponse:
+        entry = CachedResponse(body=body, etag=make_etag(body), authors=frozenset(authors))
+        with self._lock:
+            if version == (self._versions.get(self._scope(key)) or 0, self._authors_version):
+                self.backend.set(key, entry)
+        return entry
+
+    def _bump(self, scopes) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._counter += 1
+                self._versions.set(scope, self._counter)
+
+    def invalidate_publication(
+        self,
+        publication_id: int,
+        is_offer: bool,
+        university: str,
+        faculty: str,
+        subject: str,
+    ) -> None:
+        """Сбрасывает карточку публикации и все ленты, в фильтр которых она попадает."""
+        self._bump(
+            [("detail", publication_id)]
+            + [
+                ("list", is_offer, key_university, key_faculty, key_subject)
+                for key_university in (None, university)
+                for key_faculty in (None, faculty)
+                for key_subject in (None, subject)
+            ]
+        )
+        self.backend.delete(("detail", publication_id))
+
+        def affected(key, _entry) -> bool:
+            if key[0] != "list":
+                return False
+            _, key_offer, key_university, key_faculty, key_subject = key[:5]
+            return (
+                key_offer == is_offer
+                and key_university in (None, university)
+                and key_faculty in (None, faculty)
+                and key_subject in (None, subject)
+            )
+
+        self.backend.delete_where(affected)
+
+    def invalidate_detail(self, publication_id: int) -> None:
+        """Только карточка: для частых изменений счётчиков, ленты доживают до TTL."""
+        self._bump([("detail", publication_id)])
+        self.backend.delete(("detail", publication_id))
+
+    def invalidate_author(self, author_id: int) -> None:
+        with self._lock:
+            self._authors_version += 1
+        self.backend.delete_where(lambda _key, entry: author_id in entry.authors)
+
+
+response_cache = ResponseCache(InMemoryLRUBackend(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL))
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cached_json_response(request: Request, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
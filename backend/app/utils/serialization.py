@@ -0,0 +1,38 @@
+from typing import Iterable, Optional, Sequence
+
+from fastapi import Response
+
+from app.models.publication import Publication
+from app.schemas.principal import Principal
+from app.schemas.publication import PublicationBase, PublicationCompactPage, PublicationPage, PublicationRead
+
+
+# Роуты отдают готовые байты в Response: FastAPI тогда не прогоняет ответ
+# через response_model второй раз, и каждая ORM-строка валидируется ровно однажды.
+
+def json_response(body: bytes, status_code: int = 200) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def own_publication_json(publication: Publication, author: Principal) -> bytes:
+    """Публикация текущего пользователя: автор берётся из Principal, а не догружается из базы."""
+    fields = PublicationBase.model_validate(publication).model_dump()
+    return PublicationRead.model_validate({**fields, "author": author.model_dump()}).model_dump_json().encode()
+
+
+def publications_json(publications: Iterable[Publication]) -> bytes:
+    body = ",".join(PublicationRead.model_validate(p).model_dump_json() for p in publications)
+    return f"[{body}]".encode()
+
+
+def page_json(items: Sequence[Publication], next_cursor: Optional[str]) -> bytes:
+    page = PublicationPage.model_validate({"items": items, "next_cursor": next_cursor}, from_attributes=True)
+    return page.model_dump_json().encode()
+
+
+def compact_page_json(items: Sequence[Publication], next_cursor: Optional[str]) -> bytes:
+    authors = {p.author_id: p.author for p in items}
+    page = PublicationCompactPage.model_validate(
+        {"items": items, "authors": authors, "next_cursor": next_cursor}, from_attributes=True
+    )
+    return page.model_dump_json().encode()
@@ -0,0 +1,103 @@
+import argparse
+import gzip
+import mimetypes
+import os
+import re
+from typing import Iterator, List
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+
+from app.utils.compression import brotli, is_compressible, negotiate_encoding
+
+# Файлы с хешем содержимого в имени никогда не меняются по тому же URL
+_HASHED_NAME_RE = re.compile(r"_[0-9a-f]{32}(_\d+)?\.\w+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Расширение заранее сжатой копии по кодировке
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles, который разрешает клиентам кэшировать content-hashed файлы навсегда
+    и отдаёт заранее сжатые копии (file.js.br, file.js.gz), если клиент их принимает.
+    Сами файлы на лету не сжимаются."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        full_path = str(full_path)
+        available = self._precompressed_encodings(full_path)
+        response = self._precompressed_response(full_path, available, scope, status_code) if available else None
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        # Ответ по этому URL зависит от Accept-Encoding, даже если сейчас отдан оригинал:
+        # иначе общий кэш отдаст несжатую копию клиенту с br и наоборот
+        if available:
+            response.headers.add_vary_header("Accept-Encoding")
+        if _HASHED_NAME_RE.search(full_path):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    @staticmethod
+    def _precompressed_encodings(full_path: str) -> List[str]:
+        """Кодировки, для которых рядом лежит сжатая копия; для несжимаемых типов — пусто."""
+        if not is_compressible(mimetypes.guess_type(full_path)[0] or "text/plain"):
+            return []
+        return [
+            encoding for encoding, suffix in PRECOMPRESSED_SUFFIXES.items()
+            if os.path.isfile(full_path + suffix)
+        ]
+
+    def _precompressed_response(self, full_path: str, available: List[str], scope, status_code: int):
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), available)
+        if encoding is None:
+            return None
+        compressed_path = full_path + PRECOMPRESSED_SUFFIXES[encoding]
+        response = super().file_response(compressed_path, os.stat(compressed_path), scope, status_code)
+        response.headers["Content-Type"] = mimetypes.guess_type(full_path)[0] or "text/plain"
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def _compressible_files(directory: str) -> Iterator[str]:
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(tuple(PRECOMPRESSED_SUFFIXES.values())):
+                continue
+            if is_compressible(mimetypes.guess_type(path)[0] or ""):
+                yield path
+
+
+def precompress(directory: str, min_size: int = 1024) -> int:
+    """Кладёт рядом с текстовыми файлами .gz (и .br, если есть brotli) на максимальном уровне.
+
+    Сжимается один раз при сборке/деплое, поэтому уровень можно не экономить.
+    Копия, которая не меньше оригинала, не сохраняется. Возвращает число записанных файлов.
+    """
+    written = 0
+    for path in _compressible_files(directory):
+        with open(path, "rb") as source:
+            data = source.read()
+        if len(data) < min_size:
+            continue
+        variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(data, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) >= len(data):
+                continue
+            tmp_path = path + suffix + ".tmp"
+            with open(tmp_path, "wb") as target:
+                target.write(compressed)
+            os.replace(tmp_path, path + suffix)
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompress static assets: python -m app.utils.static_files static")
+    parser.add_argument("directory")
+    parser.add_argument("--min-size", type=int, default=1024)
+    args = parser.parse_args()
+    print(f"wrote {precompress(args.directory, args.min_size)} precompressed files")
@@ -0,0 +1,50 @@
+from typing import AsyncGenerator, Callable, Type
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+
+
+def _too_large(max_body_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body too large, max size is {max_body_size} bytes",
+    )
+
+
+class SizeLimitedRequest(Request):
+    """Request, который обрывает чтение тела, как только оно превысило лимит.
+
+    Starlette читает multipart через stream(), поэтому лишние байты не попадают даже во временный файл.
+    """
+
+    def __init__(self, scope, receive, max_body_size: int) -> None:
+        super().__init__(scope, receive)
+        self.max_body_size = max_body_size
+
+    async def stream(self) -> AsyncGenerator[bytes, None]:
+        received = 0
+        async for chunk in super().stream():
+            received += len(chunk)
+            if received > self.max_body_size:
+                raise _too_large(self.max_body_size)
+            yield chunk
+
+
+def size_limited_route(max_body_size: int) -> Type[APIRoute]:
+    """Класс роута, который отклоняет тело больше max_body_size до его разбора."""
+
+    class SizeLimitedRoute(APIRoute):
+        def get_route_handler(self) -> Callable:
+            original_route_handler = super().get_route_handler()
+
+            async def route_handler(request: Request) -> Response:
+                declared = request.headers.get("content-length")
+                if declared and declared.isdigit() and int(declared) > max_body_size:
+                    raise _too_large(max_body_size)
+                return await original_route_handler(
+                    SizeLimitedRequest(request.scope, request.receive, max_body_size)
+                )
+
+            return route_handler
+
+    return SizeLimitedRoute
@@ -0,0 +1,157 @@
+"""Синтетические данные для нагрузочных тестов.
+
+    python -m bench.datagen --users 2000 --publications 100000 --seed 42
+
+База берётся из DATABASE_URL (как у приложения). Генерация детерминирована при одном seed.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List
+
+BENCH_PASSWORD = "bench-password"
+
+# Университет -> факультет -> предметы. Вес университета задаёт, насколько «большая» у него доска
+CATALOG: Dict[str, Dict[str, List[str]]] = {
+    "Universität Wien": {
+        "Informatik": ["Datenbanken", "Algorithmen und Datenstrukturen", "Logik", "Statistik"],
+        "Mathematik": ["Analysis", "Lineare Algebra", "Stochastik"],
+        "Rechtswissenschaften": ["Zivilrecht", "Strafrecht", "Verfassungsrecht"],
+    },
+    "Technische Universität Wien": {
+        "Informatik": ["Programmierparadigmen", "Formale Methoden", "Rechnerarchitektur"],
+        "Architektur": ["Baukonstruktion", "Städtebau", "Entwurf"],
+        "Elektrotechnik": ["Signale und Systeme", "Elektrodynamik"],
+    },
+    "WU Wien": {
+        "Betriebswirtschaft": ["Rechnungswesen", "Marketing", "Finanzierung"],
+        "Volkswirtschaft": ["Mikroökonomie", "Makroökonomie"],
+    },
+    "BOKU": {
+        "Umweltwissenschaften": ["Ökologie", "Nachhaltigkeit", "Klimawandel"],
+    },
+    "FH Technikum Wien": {
+        "Software Engineering": ["Webentwicklung", "Mobile Apps", "Softwaredesign"],
+    },
+}
+UNIVERSITY_WEIGHTS = [50, 25, 15, 6, 4]
+
+TITLE_TEMPLATES = [
+    "Nachhilfe in {subject}",
+    "Suche Hilfe bei {subject}",
+    "Prüfungsvorbereitung {subject}",
+    "Zusammenfassung {subject} zu verkaufen",
+    "{subject}: Übungsblätter gemeinsam lösen",
+]
+DESCRIPTION_WORDS = (
+    "Übung Klausur Skript Tutorium online Präsenz Beispiele Wiederholung Grundlagen "
+    "Vertiefung Abgabe Projekt Seminar Folien Mitschrift Fragen erklären schnell geduldig"
+).split()
+
+ACTIVE_SHARE = 0.85
+HISTORY_DAYS = 365
+BATCH_SIZE = 5000
+
+
+def pick_subject(rng: random.Random):
+    university = rng.choices(list(CATALOG), weights=UNIVERSITY_WEIGHTS)[0]
+    faculty = rng.choice(list(CATALOG[university]))
+    subject = rng.choice(CATALOG[university][faculty])
+    return university, faculty, subject
+
+
+def user_email(i: int) -> str:
+    return f"bench-user-{i}@example.com"
+
+
+def generate(engine, users: int, publications: int, seed: int) -> None:
+    from sqlalchemy import insert, text
+    from sqlmodel import SQLModel
+
+    import app.models.purchase  # noqa: F401  create_all создаёт все таблицы приложения
+    import app.models.refresh_token  # noqa: F401
+    from app.models.publication import Publication
+    from app.models.user import UserTable
+    from app.utils.authentication import get_password_hash
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    SQLModel.metadata.create_all(engine)
+    # Один хеш на всех: bcrypt на каждого пользователя занял бы часы
+    hashed = get_password_hash(BENCH_PASSWORD)
+
+    with engine.begin() as conn:
+        offset = conn.execute(text("SELECT COUNT(*) FROM usertable")).scalar()
+        user_rows = []
+        for i in range(offset, offset + users):
+            user_rows.append({
+                "name": f"Bench User {i}",
+                "university": rng.choices(list(CATALOG), weights=UNIVERSITY_WEIGHTS)[0],
+                "email": user_email(i),
+                "hashed_password": hashed,
+                "is_active": True,
+                "created_at": now - timedelta(days=rng.uniform(0, HISTORY_DAYS)),
+            })
+        author_ids = []
+        for start in range(0, len(user_rows), BATCH_SIZE):
+            result = conn.execute(insert(UserTable).returning(UserTable.id), user_rows[start:start + BATCH_SIZE])
+            author_ids.extend(result.scalars().all())
+
+        # Активность авторов неравномерна: небольшая доля тьюторов пишет большую часть постов
+        # Накопленные веса считаются один раз: с weights= choices пересчитывал бы их на каждой строке
+        author_cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(author_ids))))
+        batch = []
+        for _ in range(publications):
+            university, faculty, subject = pick_subject(rng)
+            is_active = rng.random() < ACTIVE_SHARE
+            created_at = now - timedelta(seconds=rng.uniform(0, HISTORY_DAYS * 86400))
+            batch.append({
+                "is_offer": rng.random() < 0.6,
+                "title": rng.choice(TITLE_TEMPLATES).format(subject=subject),
+                "university": university,
+                "faculty": faculty,
+                "subject": subject,
+                "price": round(rng.uniform(0, 60), 2),
+                "description": " ".join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(8, 40))),
+                "bought": rng.randint(0, 20),
+                "is_active": is_active,
+                "created_at": created_at,
+                # Скрыта где-то между публикацией и сегодняшним днём: архиватору есть что переносить
+                "deactivated_at": None if is_active else created_at + (now - created_at) * rng.random(),
+                "author_id": rng.choices(author_ids, cum_weights=author_cum_weights)[0],
+            })
+            if len(batch) >= BATCH_SIZE:
+                conn.execute(insert(Publication), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Publication), batch)
+
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("DELETE FROM publication_fts"))
+            conn.execute(text(
+                "INSERT INTO publication_fts (rowid, title, description) "
+                "SELECT id, title, description FROM publication WHERE is_active"
+            ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--publications", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Для данных стенда хватает минимальной стоимости bcrypt
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    from app.dependencies import engine
+
+    started = time.perf_counter()
+    generate(engine, args.users, args.publications, args.seed)
+    print(f"generated {args.users} users, {args.publications} publications in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Время холодного импорта приложения — сколько воркер uvicorn тратит до первого запроса.
+
+    python -m bench.import_time
+    python -m bench.import_time --budget-ms 1500 --top 15
+
+Импорт запускается в чистом интерпретаторе с -X importtime; скрипт печатает
+суммарное время и самые дорогие модули. С --budget-ms завершается с кодом 1,
+если медиана прогонов вышла за бюджет, — удобно для CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Модули, которые не должны грузиться при старте: их тянут только конкретные запросы
+LAZY_MODULES = ("passlib", "PIL", "alembic")
+
+
+def measure(module: str) -> Tuple[int, Dict[str, int]]:
+    """Один прогон: (общее время в мкс, {модуль: собственное время в мкс})."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    self_times: Dict[str, int] = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        self_times[name] = int(self_us)
+        if name == module:
+            total = int(cumulative_us)
+    return total, self_times
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    median_ms = statistics.median(total for total, _ in runs) / 1000
+    _, self_times = runs[-1]
+
+    print(f"import {args.module}: median {median_ms:.0f} ms over {args.runs} runs")
+    for name, self_us in sorted(self_times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    eager = sorted({name.split(".")[0] for name in self_times if name.split(".")[0] in LAZY_MODULES})
+    if eager:
+        print(f"loaded at import time, expected lazy: {', '.join(eager)}")
+
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"over budget: {median_ms:.0f} ms > {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Смешанная нагрузка на ASGI-приложение в том же процессе.
+
+    python -m bench.datagen --users 1000 --publications 50000
+    python -m bench.run --requests 5000 --concurrency 32 --output before.json
+
+Отчёт: p50/p95/p99 и пропускная способность по каждому эндпоинту, в JSON.
+Сравнивать имеет смысл прогоны на одних и тех же данных и с одним seed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from bench.datagen import BENCH_PASSWORD, pick_subject
+
+# Доли операций в смеси; чтение ленты доминирует, как и в реальном трафике
+WORKLOAD = {
+    "list": 45,
+    "list_filtered": 15,
+    "detail": 15,
+    "profile": 8,
+    "login": 2,
+    "create": 8,
+    "patch_state": 7,
+}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Workload:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        tokens: Dict[int, str],
+        emails: Dict[int, str],
+        publication_ids: List[int],
+    ):
+        self.client = client
+        self.rng = random.Random(0)
+        self.tokens = tokens
+        self.emails = emails
+        self.publication_ids = publication_ids
+        self.own_publications: Dict[int, List[int]] = defaultdict(list)
+
+    def _auth(self, user_id: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+    async def list(self) -> httpx.Response:
+        tab = self.rng.choice(["help", "need"])
+        return await self.client.get("/publications/", params={"tab": tab, "limit": 20})
+
+    async def list_filtered(self) -> httpx.Response:
+        university, faculty, subject = pick_subject(self.rng)
+        params = {"tab": self.rng.choice(["help", "need"]), "university": university, "limit": 20}
+        if self.rng.random() < 0.5:
+            params["faculty"] = faculty
+            if self.rng.random() < 0.5:
+                params["subject"] = subject
+        return await self.client.get("/publications/", params=params)
+
+    async def detail(self) -> httpx.Response:
+        return await self.client.get(f"/publications/{self.rng.choice(self.publication_ids)}")
+
+    async def profile(self) -> httpx.Response:
+        return await self.client.get(f"/profile/{self.rng.choice(list(self.tokens))}")
+
+    async def login(self) -> httpx.Response:
+        user_id = self.rng.choice(list(self.emails))
+        return await self.client.post(
+            "/auth/login", data={"username": self.emails[user_id], "password": BENCH_PASSWORD}
+        )
+
+    async def create(self) -> httpx.Response:
+        user_id = self.rng.choice(list(self.tokens))
+        university, faculty, subject = pick_subject(self.rng)
+        response = await self.client.post(
+            "/publications/",
+            headers=self._auth(user_id),
+            json={
+                "is_offer": self.rng.random() < 0.6,
+                "title": f"Bench {subject}",
+                "university": university,
+                "faculty": faculty,
+                "subject": subject,
+                "price": 10,
+                "description": "Benchmark publication",
+            },
+        )
+        if response.status_code == 201:
+            self.own_publications[user_id].append(response.json()["id"])
+        return response
+
+    async def patch_state(self) -> httpx.Response:
+        candidates = [user_id for user_id, pubs in self.own_publications.items() if pubs]
+        if not candidates:
+            return await self.create()
+        user_id = self.rng.choice(candidates)
+        publication_id = self.rng.choice(self.own_publications[user_id])
+        return await self.client.patch(
+            f"/publications/{publication_id}",
+            headers=self._auth(user_id),
+            json={"is_active": self.rng.random() < 0.5},
+        )
+
+
+async def _prepare(client: httpx.AsyncClient, users: int) -> Workload:
+    from sqlmodel import Session, select
+
+    from app.dependencies import engine
+    from app.models.publication import Publication
+    from app.models.user import UserTable
+
+    with Session(engine) as db:
+        accounts = db.exec(select(UserTable.id, UserTable.email).where(UserTable.email.like("bench-user-%")).limit(users)).all()
+        publication_ids = db.exec(select(Publication.id).where(Publication.is_active == True).limit(10000)).all()
+    if not accounts or not publication_ids:
+        sys.exit("no benchmark data: run `python -m bench.datagen` first")
+
+    tokens = {}
+    for user_id, email in accounts:
+        response = await client.post("/auth/login", data={"username": email, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        tokens[user_id] = response.json()["access_token"]
+
+    return Workload(client, tokens, dict(accounts), list(publication_ids))
+
+
+async def run(requests: int, concurrency: int, users: int, seed: int) -> dict:
+    # Все запросы идут с одного адреса; лимиты входа мерили бы сами себя, а не приложение
+    for name in ("LOGIN_RATE_PER_IP", "LOGIN_RATE_PER_EMAIL"):
+        os.environ.setdefault(name, "1000000")
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        workload = await _prepare(client, users)
+        workload.rng = random.Random(seed)
+        operations = workload.rng.choices(list(WORKLOAD), weights=list(WORKLOAD.values()), k=requests)
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        queue: asyncio.Queue = asyncio.Queue()
+        for operation in operations:
+            queue.put_nowait(operation)
+
+        async def worker() -> None:
+            while not queue.empty():
+                operation = queue.get_nowait()
+                started = time.perf_counter()
+                response = await getattr(workload, operation)()
+                latencies[operation].append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors[operation] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seed": seed,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "endpoints": {
+            operation: {
+                "count": len(samples),
+                "errors": errors[operation],
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                "mean_ms": round(statistics.fmean(samples), 2),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+            }
+            for operation, samples in sorted(latencies.items())
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=50, help="сколько аккаунтов залогинить для записи")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="файл для JSON-отчёта; по умолчанию stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.requests, args.concurrency, args.users, args.seed))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
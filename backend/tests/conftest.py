@@ -0,0 +1,84 @@
+"""Общие фикстуры: приложение на временной SQLite и счётчик SQL-запросов."""
+import os
+import tempfile
+from typing import Callable, ContextManager, Dict, Iterator, Tuple
+
+import pytest
+
+# Движки создаются при импорте app.dependencies, поэтому окружение задаётся до импорта приложения
+_tmpdir = tempfile.mkdtemp(prefix="unihelp-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+os.environ["SCHEMA_STARTUP_MODE"] = "create_all"
+os.environ.setdefault("ARCHIVER_ENABLED", "false")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel
+
+from app.crud.user import principal_cache
+from app.dependencies import async_engine, async_read_engine, engine, read_engine
+from app.main import app as fastapi_app
+from app.models.user import UserTable
+from app.routers.publication import facets_cache
+from app.utils.authentication import create_access_token
+from app.utils.query_counter import QueryCounter
+from app.utils.query_counter import count_queries as _count_queries
+from app.utils.response_cache import response_cache
+
+# Все движки приложения: async-роуты ходят через sync_engine своих async-движков
+ENGINES = (engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine)
+
+
+def _reset_state() -> None:
+    with Session(engine) as db:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            db.execute(table.delete())
+        db.execute(text("DELETE FROM publication_fts"))
+        db.commit()
+    response_cache.backend.clear()
+    facets_cache.clear()
+    principal_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def app() -> FastAPI:
+    return fastapi_app
+
+
+@pytest.fixture(scope="session")
+def _session_client(app: FastAPI) -> Iterator[TestClient]:
+    # Вход в контекст запускает startup: create_all создаёт схему во временной базе
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(_session_client: TestClient) -> TestClient:
+    """Клиент приложения; каждый тест начинает с пустой базы и пустых кэшей."""
+    _reset_state()
+    return _session_client
+
+
+@pytest.fixture
+def make_user(client: TestClient) -> Callable[..., Tuple[int, Dict[str, str]]]:
+    """Создаёт пользователя прямо в базе, без bcrypt: (id, заголовки с его access-токеном)."""
+    def make(email: str = "user@example.com") -> Tuple[int, Dict[str, str]]:
+        with Session(engine) as db:
+            user = UserTable(name="User", university="University", email=email, hashed_password="!")
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+            return user.id, {"Authorization": f"Bearer {create_access_token(email)}"}
+
+    return make
+
+
+@pytest.fixture
+def count_queries() -> Callable[[], ContextManager[QueryCounter]]:
+    """Считает запросы всех движков приложения внутри блока::
+
+        with count_queries() as counter:
+            client.get("/publications/?tab=help")
+    """
+    return lambda: _count_queries(*ENGINES)
@@ -0,0 +1,32 @@
+"""Холодный старт воркера: бюджет времени импорта и ленивые зависимости."""
+import os
+import statistics
+import subprocess
+import sys
+
+from bench.import_time import BACKEND_DIR, LAZY_MODULES, measure
+
+# Медиана по нескольким прогонам в чистом интерпретаторе. Бюджет — около 1,5× от замеренных
+# ~1,2 с, чтобы новая тяжёлая зависимость на старте была заметна; на медленных CI поднимается через окружение
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1800"))
+RUNS = 3
+
+
+def test_app_import_time_within_budget():
+    median_ms = statistics.median(measure("app.main")[0] for _ in range(RUNS)) / 1000
+    assert median_ms <= IMPORT_TIME_BUDGET_MS, f"import app.main: {median_ms:.0f} ms > {IMPORT_TIME_BUDGET_MS:.0f} ms"
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    code = (
+        "import sys, app.main; "
+        "print(' '.join(sorted({name.split('.')[0] for name in sys.modules} & set(sys.argv[1:]))))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, *LAZY_MODULES],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.split() == []
@@ -0,0 +1,53 @@
+"""Число SQL-запросов листингов не должно зависеть от размера выдачи (N+1)."""
+import pytest
+
+MANY = 15
+
+
+def _create(client, headers, count: int) -> None:
+    item = {
+        "is_offer": True,
+        "title": "Линейная алгебра",
+        "university": "University",
+        "faculty": "Faculty",
+        "subject": "Math",
+        "description": "Помогу с контрольной",
+    }
+    response = client.post("/publications/batch", json={"items": [item] * count}, headers=headers)
+    assert response.status_code == 201, response.text
+
+
+def _items(body):
+    return body if isinstance(body, list) else body["items"]
+
+
+# by_author: листинг одного автора; в общей ленте публикации от разных авторов,
+# иначе ленивая загрузка автора не была бы видна — он один на всю выдачу
+@pytest.mark.parametrize("url, by_author", [
+    ("/publications/?tab=help", False),
+    ("/profile/{user_id}/publications", True),
+    ("/users/me/publications", True),
+])
+def test_listing_query_count_does_not_grow_with_results(client, make_user, count_queries, url, by_author):
+    user_id, headers = make_user()
+    url = url.format(user_id=user_id)
+    # Прогрев: соединения движков и кэш пользователя не должны попасть в замер
+    assert client.get(url, headers=headers).status_code == 200
+
+    _create(client, headers, 1)
+    with count_queries() as one:
+        response = client.get(url, headers=headers)
+    assert len(_items(response.json())) == 1
+
+    if by_author:
+        _create(client, headers, MANY - 1)
+    else:
+        for i in range(MANY - 1):
+            _, other = make_user(f"author{i}@example.com")
+            _create(client, other, 1)
+    with count_queries() as many:
+        response = client.get(url, headers=headers)
+    assert len(_items(response.json())) == MANY
+
+    assert one.count > 0
+    assert many.count == one.count, many.statements
@@ -12,6 +12,8 @@ export interface LoginParams {
   export interface Token {
     access_token: string;
     token_type: string;
+    /** Долгоживущий токен для /auth/refresh; меняется при каждом обновлении */
+    refresh_token?: string;
   }
   
   /** Параметры для регистрации (добавили repeat_password) */
@@ -30,6 +32,8 @@ export interface LoginParams {
     university: string;
     bio: string;
     avatar: string;
+    /** Превью аватара по размеру: "48", "128", "256" */
+    avatar_variants?: Record<string, string>;
   }
   
   export async function login(
@@ -60,6 +64,30 @@ export interface LoginParams {
     return await resp.json();
   }
   
+  /** Новый access-токен по refresh-токену, без повторного ввода пароля */
+  export async function refreshToken(refresh_token: string): Promise<Token> {
+    const resp = await fetch(`${API_BASE_URL}/auth/refresh`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token }),
+    });
+
+    if (!resp.ok) {
+      const err = await resp.json().catch(() => null);
+      throw new Error(err?.detail ?? resp.statusText);
+    }
+
+    return await resp.json();
+  }
+
+  export async function logout(refresh_token: string): Promise<void> {
+    await fetch(`${API_BASE_URL}/auth/logout`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token }),
+    });
+  }
+
   /**
    * API-метод регистрации.
    * POST /register  с полями name, university, email, password, repeat_password
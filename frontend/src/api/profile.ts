@@ -1,5 +1,5 @@
 import { API_BASE_URL } from './config';
-import { Publication } from "./publications";
+import { PublicationPage } from "./publications";
 
 
 export interface Profile {
@@ -9,12 +9,11 @@ export interface Profile {
     bio: string;
     avatar: string;
     created_at: string;
-    publications: Publication[];
     active_offers: number;
     active_requests: number;
     helped: number;
     got_help: number;
-    rating: number;
+    rating: number | null;
 }
 
 export interface EditProfileParams {
@@ -42,6 +41,23 @@ export async function fetchProfile(id: number): Promise<Profile> {
 }
 
 
+export async function fetchProfilePublications(id: number, cursor?: string): Promise<PublicationPage> {
+    const qp = new URLSearchParams(cursor ? { cursor } : {});
+    const resp = await fetch(`${API_BASE_URL}/profile/${id}/publications?${qp}`, {
+      method: 'GET',
+      headers: {
+        Accept: 'application/json',
+      },
+    });
+
+    if (!resp.ok) {
+      const err = await resp.json().catch(() => null);
+      throw new Error(err?.detail || resp.statusText);
+    }
+    return (await resp.json()) as PublicationPage;
+}
+
+
 export async function updateProfile(profileData: EditProfileParams, id: number) {
   const token = localStorage.getItem('token') || '';
   const resp = await fetch(
@@ -36,11 +36,18 @@ export interface Publication {
 }
 
 
+export interface PublicationPage {
+  items: Publication[];
+  next_cursor: string | null;
+}
+
+
 export interface FetchPublicationParams {
   tab: 'need' | 'help';
   university?: string;
   faculty?: string;
   subject?: string;
+  cursor?: string;
 }
 
 
@@ -167,11 +174,12 @@ export async function updatePublicationState(
 
 export async function fetchPublications(
   params: FetchPublicationParams
-): Promise<Publication[]> {
+): Promise<PublicationPage> {
   const qp: Record<string, string> = { tab: params.tab };
   if (params.university) qp.university = params.university;
   if (params.faculty)    qp.faculty    = params.faculty;
   if (params.subject)    qp.subject    = params.subject;
+  if (params.cursor)     qp.cursor     = params.cursor;
 
   const url = `${API_BASE_URL}/publications?${new URLSearchParams(qp)}`;
 
@@ -185,5 +193,74 @@ export async function fetchPublications(
     throw new Error(err?.detail || resp.statusText);
   }
 
-  return (await resp.json()) as Publication[];
-}
\ No newline at end of file
+  return (await resp.json()) as PublicationPage;
+}
+
+export interface FacetCount {
+  value: string;
+  count: number;
+}
+
+
+export interface PublicationFacets {
+  university: FacetCount[];
+  faculty: FacetCount[];
+  subject: FacetCount[];
+}
+
+
+export async function fetchPublicationFacets(
+  params: Omit<FetchPublicationParams, 'cursor'>
+): Promise<PublicationFacets> {
+  const qp: Record<string, string> = { tab: params.tab };
+  if (params.university) qp.university = params.university;
+  if (params.faculty)    qp.faculty    = params.faculty;
+  if (params.subject)    qp.subject    = params.subject;
+
+  const url = `${API_BASE_URL}/publications/facets?${new URLSearchParams(qp)}`;
+
+  const resp = await fetch(url, {
+    method: 'GET',
+    headers: { 'Accept': 'application/json' },
+  });
+
+  if (!resp.ok) {
+    const err = await resp.json().catch(() => null);
+    throw new Error(err?.detail || resp.statusText);
+  }
+
+  return (await resp.json()) as PublicationFacets;
+}
+
+
+export interface Purchase {
+  id: number;
+  publication_id: number;
+  buyer_id: number;
+  price: number;
+  created_at: string;
+}
+
+
+// idempotencyKey генерируется один раз на нажатие «Купить» и переиспользуется при повторах
+export async function purchasePublication(
+  id: number,
+  idempotencyKey: string = crypto.randomUUID()
+): Promise<Purchase> {
+  const token = localStorage.getItem('token') || '';
+  const resp = await fetch(`${API_BASE_URL}/publications/${id}/purchase`, {
+    method: 'POST',
+    headers: {
+      'Accept':          'application/json',
+      'Idempotency-Key': idempotencyKey,
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+  });
+
+  if (!resp.ok) {
+    const err = await resp.json().catch(() => null);
+    throw new Error(err?.detail || resp.statusText);
+  }
+
+  return (await resp.json()) as Purchase;
+}
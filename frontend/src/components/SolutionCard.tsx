@@ -63,7 +63,7 @@ export default function SolutionCard({ data, is_demo = false }: { data: Publicat
               <div className="flex items-center space-x-3 mb-3">
                 { data.author.avatar ? (
                   <img
-                    src={`${API_BASE_URL}${data.author.avatar}`}
+                    src={`${API_BASE_URL}${data.author.avatar_variants?.['48'] ?? data.author.avatar}`}
                     alt={data.author.name}
                     className="w-10 h-10 rounded-full object-cover border-2 border-gray-200"
                   />
@@ -2,7 +2,7 @@
 import { createContext, useContext, useState, useEffect, ReactNode } from 'react';
 import { jwtDecode } from 'jwt-decode';
 import { useNavigate } from 'react-router-dom';
-import { login as apiLogin, User } from '@/api/auth';
+import { login as apiLogin, logout as apiLogout, refreshToken as apiRefresh, User } from '@/api/auth';
 import { fetchCurrentUser } from '@/api/users';
 
 interface TokenPayload {
@@ -18,6 +18,15 @@ interface AuthContextType {
   logout: () => void;
 }
 
+// Обновляем access-токен заранее, чтобы запросы не упирались в истёкший
+const REFRESH_AHEAD_MS = 60 * 1000;
+
+// Вкладки делят один refresh-токен: обновляет одна, остальные берут её результат
+function withRefreshLock(task: () => Promise<void>): Promise<void> {
+  if ('locks' in navigator) return navigator.locks.request('auth-refresh', task);
+  return task();
+}
+
 const AuthContext = createContext<AuthContextType | undefined>(undefined);
 
 export function AuthProvider({ children }: { children: ReactNode }) {
@@ -42,6 +51,15 @@ export function AuthProvider({ children }: { children: ReactNode }) {
     }
   }, [token]);
 
+  // Вход, выход и обновление токена в другой вкладке
+  useEffect(() => {
+    const onStorage = (e: StorageEvent) => {
+      if (e.key === 'token') setToken(e.newValue);
+    };
+    window.addEventListener('storage', onStorage);
+    return () => window.removeEventListener('storage', onStorage);
+  }, []);
+
   useEffect(() => {
     if (!token) return;
     let payload: TokenPayload;
@@ -55,25 +73,60 @@ export function AuthProvider({ children }: { children: ReactNode }) {
     const now = Date.now();
     const msLeft = expiresAt - now;
 
-    if (msLeft <= 0) {
+    if (msLeft <= 0 && !localStorage.getItem('refresh_token')) {
       setToken(null);
       return;
     }
 
     const timer = setTimeout(() => {
-      setToken(null);
-      navigate('/login', { replace: true });
-    }, msLeft);
+      withRefreshLock(async () => {
+        // Другая вкладка уже обновила токен, пока мы ждали
+        const stored = localStorage.getItem('token');
+        if (stored && stored !== token) {
+          setToken(stored);
+          return;
+        }
+        // Читаем при срабатывании: за время ожидания токен могла заменить другая вкладка
+        const refresh = localStorage.getItem('refresh_token');
+        if (!refresh) {
+          setToken(null);
+          navigate('/login', { replace: true });
+          return;
+        }
+        try {
+          const resp = await apiRefresh(refresh);
+          if (resp.refresh_token) localStorage.setItem('refresh_token', resp.refresh_token);
+          // Пишем до снятия блокировки, чтобы следующая вкладка увидела новый токен
+          localStorage.setItem('token', resp.access_token);
+          setToken(resp.access_token);
+        } catch {
+          const current = localStorage.getItem('token');
+          if (localStorage.getItem('refresh_token') !== refresh && current) {
+            setToken(current);
+            return;
+          }
+          localStorage.removeItem('refresh_token');
+          setToken(null);
+          navigate('/login', { replace: true });
+        }
+      });
+    }, Math.max(msLeft - REFRESH_AHEAD_MS, 0));
 
     return () => clearTimeout(timer);
   }, [token, navigate]);
 
   const login = async (email: string, password: string) => {
     const resp = await apiLogin({ email, password });
+    if (resp.refresh_token) localStorage.setItem('refresh_token', resp.refresh_token);
     setToken(resp.access_token);
   };
 
   const logout = () => {
+    const refresh = localStorage.getItem('refresh_token');
+    if (refresh) {
+      localStorage.removeItem('refresh_token');
+      apiLogout(refresh).catch(() => {});
+    }
     setToken(null);
     navigate('/login', { replace: true });
   };
@@ -40,7 +40,7 @@ export default function Search() {
     };
 
     fetchPublications(params)
-      .then((data) => setAllSolutions(data))
+      .then((data) => setAllSolutions(data.items))
       .catch((err) => setError(err.message))
       .finally(() => setLoading(false));
     }, [filters.tab, facultyParam, subjectParam, universityParam]);